@@ -0,0 +1,260 @@
+"""Latency histograms, counters and a local metrics endpoint for the examples."""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Monotonic, high-resolution clock used for every measurement
+now = time.perf_counter
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram:
+    """
+    Fixed-memory log-linear (HDR-style) latency histogram.
+
+    Values are stored in microseconds in buckets that cover each power of
+    two with `sub_buckets` linear steps, which keeps the relative error
+    around 1 / sub_buckets (3% by default) from 1 us up to ~2 minutes.
+    Memory use never grows, however long the run.
+    """
+
+    def __init__(self, sub_buckets=32, max_exponent=27):
+        self.sub_buckets = sub_buckets
+        self.max_exponent = max_exponent
+        self.counts = [0] * (sub_buckets * (max_exponent + 1))
+        self.lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _index(self, micros):
+        """Bucket index for a value in microseconds."""
+        if micros < 1:
+            return 0
+        exponent = min(int(micros).bit_length() - 1, self.max_exponent)
+        base = 1 << exponent
+        step = int((micros - base) * self.sub_buckets / base)
+        step = min(step, self.sub_buckets - 1)
+        return exponent * self.sub_buckets + step
+
+    def _value(self, index):
+        """Upper edge of a bucket, in seconds."""
+        exponent, step = divmod(index, self.sub_buckets)
+        base = 1 << exponent
+        return (base + base * (step + 1) / self.sub_buckets) / 1e6
+
+    def record(self, seconds):
+        """Add one sample, in seconds."""
+        index = self._index(seconds * 1e6)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Value at quantile `q` (0-1), in seconds."""
+        with self.lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, int(round(q * self.count)))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    if index == len(self.counts) - 1:
+                        return self.max  # Values beyond the range land here
+                    return min(self._value(index), self.max)
+            return self.max
+
+    def mean(self):
+        """Mean of all samples, in seconds."""
+        return self.sum / self.count if self.count else 0.0
+
+    def snapshot(self, quantiles=DEFAULT_QUANTILES):
+        """Summary statistics as a plain dict."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean(),
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "quantiles": {str(q): self.percentile(q) for q in quantiles},
+        }
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        """Increase the counter by `amount`."""
+        with self.lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    """Named histograms, counters and gauges with Prometheus and JSON output."""
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.help = {}
+
+    def histogram(self, name, help_text=""):
+        """Get or create a latency histogram (values in seconds)."""
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+                self.help[name] = help_text
+            return self.histograms[name]
+
+    def counter(self, name, help_text=""):
+        """Get or create a counter."""
+        with self.lock:
+            if name not in self.counters:
+                self.counters[name] = Counter()
+                self.help[name] = help_text
+            return self.counters[name]
+
+    def gauge(self, name, fn, help_text=""):
+        """Register a gauge whose value is read from `fn()` at scrape time."""
+        with self.lock:
+            self.gauges[name] = fn
+            self.help[name] = help_text
+
+    @contextmanager
+    def timer(self, name):
+        """Time the `with` block into histogram `name`."""
+        histogram = self.histogram(name)
+        start = now()
+        try:
+            yield
+        finally:
+            histogram.record(now() - start)
+
+    def snapshot(self):
+        """All metrics as a JSON-serializable dict."""
+        with self.lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            "timestamp": time.time(),
+            "histograms": {n: h.snapshot() for n, h in histograms.items()},
+            "counters": {n: c.value for n, c in counters.items()},
+            "gauges": {n: _read_gauge(fn) for n, fn in gauges.items()},
+        }
+
+    def dump_json(self, path):
+        """Write a snapshot to `path`."""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        for name, value in snapshot["counters"].items():
+            full_name = f"{self.prefix}{name}_total"
+            lines += _help_lines(full_name, self.help.get(name), "counter")
+            lines.append(f"{full_name} {value}")
+
+        for name, value in snapshot["gauges"].items():
+            full_name = f"{self.prefix}{name}"
+            lines += _help_lines(full_name, self.help.get(name), "gauge")
+            lines.append(f"{full_name} {value}")
+
+        for name, summary in snapshot["histograms"].items():
+            full_name = f"{self.prefix}{name}"
+            lines += _help_lines(full_name, self.help.get(name), "summary")
+            for q, value in summary["quantiles"].items():
+                lines.append(f'{full_name}{{quantile="{q}"}} {value:.6f}')
+            lines.append(f"{full_name}_sum {summary['sum']:.6f}")
+            lines.append(f"{full_name}_count {summary['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _read_gauge(fn):
+    """Read a gauge callback, reporting NaN if it fails."""
+    try:
+        return float(fn())
+    except Exception:
+        return float("nan")
+
+
+def _help_lines(name, help_text, metric_type):
+    """HELP and TYPE comment lines for one metric."""
+    lines = [f"# HELP {name} {help_text}"] if help_text else []
+    return lines + [f"# TYPE {name} {metric_type}"]
+
+
+def _make_handler(registry):
+    """Build a request handler class bound to `registry`."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body = json.dumps(registry.snapshot()).encode()
+                content_type = "application/json"
+            elif self.path.startswith("/metrics"):
+                body = registry.prometheus_text().encode()
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet
+
+    return MetricsHandler
+
+
+_servers = {}
+_registries = {}
+_lock = threading.Lock()
+
+
+def get_registry(prefix="edge_ai_"):
+    """Return the process-wide registry for `prefix`."""
+    with _lock:
+        if prefix not in _registries:
+            _registries[prefix] = MetricsRegistry(prefix)
+        return _registries[prefix]
+
+
+def start_metrics_server(registry, port):
+    """
+    Serve `/metrics` (Prometheus text) and `/metrics.json` on `port`.
+
+    Starting the server again on the same port is a no-op.
+
+    Raises:
+        OSError: If the port cannot be bound, e.g. because it is in use
+    """
+    with _lock:
+        if port not in _servers:
+            httpd = ThreadingHTTPServer(("0.0.0.0", port), _make_handler(registry))
+            httpd.daemon_threads = True
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            _servers[port] = httpd
+        return _servers[port]
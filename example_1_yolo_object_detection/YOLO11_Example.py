@@ -1,25 +1,91 @@
 """Main entry point for YOLO11 Streamlit demo."""
 
+import os
+import threading
 import time
 from collections import deque
+from datetime import datetime
+from functools import partial
 import cv2
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from modules.device_config import IS_RASPBERRY_PI
-from modules.camera_handler import setup_camera, get_frame
+from modules.camera_handler import setup_camera, get_frame, cleanup_camera
 from modules.ui_components import (
     setup_page_config,
     render_header,
     render_arm_logo,
     setup_sidebar,
+    setup_performance_settings,
     upload_video,
+    display_video_summary,
+    display_cached_video,
+    render_mjpeg_viewer,
+    render_model_registry_stats,
+    setup_multi_stream_settings,
+    setup_replay_settings,
+    display_multi_stream,
+    display_multi_stream_metrics,
     display_metrics,
 )
-from modules.yolo_inference import load_model, run_inference
+from modules.yolo_inference import load_model, predict, annotate
+from modules.adaptive_controller import AdaptiveFpsController, STRIDE_LEVELS
+from modules.motion_gate import MotionGate
+from modules.annotator import FastAnnotator
+from modules.tiled_inference import TiledPredictor
+from modules.mjpeg_server import get_mjpeg_server
+from modules.model_registry import get_model_registry
+from modules.multi_stream import MultiStreamScheduler
+from modules.detection_export import create_exporter
+from modules.cpu_config import apply_cpu_settings, inference_pool_threads
+from modules.video_cache import get_result_cache, is_active_session, result_key
+from modules.recording import create_recorder
+from edge_ai_common.instrumentation import get_registry, now, start_metrics_server
+
+metrics = get_registry()
+
+
+def start_exporter(perf_settings):
+    """Start the detection exporter if enabled, warning instead of failing."""
+    try:
+        return create_exporter(perf_settings)
+    except (ImportError, OSError) as e:
+        st.warning(f"Detection export disabled: {e}")
+        return None
+
+
+def start_mjpeg_stream(port, allow_lan, result_frame):
+    """
+    Open this session's stream on the MJPEG server and embed it in the page.
+
+    Returns:
+        tuple: (server, broadcaster), or (None, None) if the port is unavailable
+    """
+    try:
+        server = get_mjpeg_server(port, allow_lan=allow_lan)
+    except OSError as e:
+        st.warning(f"MJPEG stream output disabled, port {port} unavailable: {e}")
+        return None, None
+
+    ctx = get_script_run_ctx()
+    stream_name = ctx.session_id[:8] if ctx is not None else "local"
+    broadcaster = server.open_stream(stream_name)
+    # The page embeds the stream once; frames no longer go through st.image
+    with result_frame.container():
+        render_mjpeg_viewer(port, stream_name)
+    return server, broadcaster
 
 
 def process_video_file(
-    video_path, confidence, model_path, task, stats_placeholder, result_frame
+    video_path,
+    confidence,
+    model_path,
+    task,
+    stats_placeholder,
+    result_frame,
+    perf_settings,
+    cache_key=None,
 ):
     """Process an uploaded video file with YOLO inference."""
     model = load_model(model_path)
@@ -29,9 +95,23 @@ def process_video_file(
         stats_placeholder.error("Could not open video file.")
         return
 
+    exporter = start_exporter(perf_settings)
+
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps_video = cap.get(cv2.CAP_PROP_FPS)
 
+    # Store the annotated video so the same clip and settings are not rerun
+    cache_writer = None
+    if cache_key is not None:
+        frame_size = (
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        try:
+            cache_writer = get_result_cache().writer(cache_key, fps_video, frame_size)
+        except OSError as e:
+            st.warning(f"Result caching disabled: {e}")
+
     stats_placeholder.info(
         f"📹 Processing {total_frames} frames at {fps_video:.1f} FPS..."
     )
@@ -47,9 +127,17 @@ def process_video_file(
             if not success or frame is None:
                 break
 
-            annotated_frame, inference_time = run_inference(model, frame, confidence)
+            results, inference_time = predict(model, frame, confidence)
+            annotated_frame = annotate(results)
             inference_times.append(inference_time)
 
+            if cache_writer is not None:
+                cache_writer.write(annotated_frame)
+
+            if exporter is not None:
+                timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                exporter.submit(results, frame_count, timestamp, "video")
+
             if frame_count % 5 == 0:
                 # Center the video frame
                 with result_frame.container():
@@ -81,21 +169,30 @@ def process_video_file(
         avg_inference_time = sum(inference_times) / len(inference_times)
         inference_fps = 1.0 / avg_inference_time if avg_inference_time > 0 else 0
 
-        stats_placeholder.success(f"""
-        ✅ **Processing Complete!**  
-        - Processed {frame_count} frames  
-        - Average inference time: {avg_inference_time * 1000:.1f} ms  
-        - Inference FPS: {inference_fps:.1f}
-        """)
+        stats = {
+            "frames": frame_count,
+            "avg_inference_time": avg_inference_time,
+            "inference_fps": inference_fps,
+            "model": model_path,
+            "task": task,
+            "confidence": confidence,
+        }
+        display_video_summary(stats_placeholder, stats)
+
+        if cache_writer is not None:
+            cache_writer.commit(stats)
+            cache_writer = None
 
     finally:
         cap.release()
+        if cache_writer is not None:
+            cache_writer.abort()  # Stopped or failed part-way
+        if exporter is not None:
+            exporter.close()
 
 
 def run_camera_stream(
-    camera_thread,
-    cap,
-    use_picamera,
+    camera,
     model,
     task,
     yolo_enabled,
@@ -103,17 +200,87 @@ def run_camera_stream(
     stats_placeholder,
     result_frame,
     source,
+    perf_settings,
 ):
     """Run the continuous camera stream with optional YOLO inference."""
     frame_times = deque(maxlen=30)
     inference_times = deque(maxlen=30)
+    latencies = deque(maxlen=30)
+
+    controller = None
+    if perf_settings["adaptive_enabled"]:
+        # Tiles keep their own input size, so only the stride can change
+        levels = STRIDE_LEVELS if perf_settings["tiled_enabled"] else None
+        controller = AdaptiveFpsController(perf_settings["target_fps"], levels)
+
+    motion_gate = None
+    if perf_settings["motion_gating"]:
+        motion_gate = MotionGate(
+            threshold=perf_settings["motion_threshold"],
+            keyframe_interval=perf_settings["keyframe_interval"],
+        )
+
+    tiler = None
+    if perf_settings["tiled_enabled"]:
+        tiler = TiledPredictor(
+            tile_size=perf_settings["tile_size"],
+            overlap=perf_settings["tile_overlap"],
+            rois=perf_settings["tile_rois"],
+            full_frame=perf_settings["tile_full_frame"],
+        )
+
+    annotator = None
+    if perf_settings["fast_annotation"]:
+        annotator = FastAnnotator(
+            show_labels=perf_settings["show_labels"],
+            show_masks=perf_settings["show_masks"],
+        )
+
+    mjpeg_server, mjpeg_stream = None, None
+    if perf_settings["mjpeg_enabled"]:
+        mjpeg_server, mjpeg_stream = start_mjpeg_stream(
+            perf_settings["mjpeg_port"], perf_settings["mjpeg_lan"], result_frame
+        )
+
+    exporter = start_exporter(perf_settings) if yolo_enabled else None
+
+    recorder = None
+    if perf_settings["record_enabled"] and source != "replay":
+        recorder = create_recorder(
+            source, perf_settings["record_format"], perf_settings["record_scale"]
+        )
+        camera.recorder = recorder
+
+    # This thread runs inference; capture and display can be moved off its cores.
+    # The thread count, the pool threads and the main (Tornado) thread are
+    # shared by every session, so those settings apply to the whole process.
+    render_threads = []
+    if threading.current_thread() is not threading.main_thread():
+        # Run headless (replay_benchmark.py), the main thread is this one
+        render_threads.append(threading.main_thread().native_id)
+    if mjpeg_stream is not None:
+        render_threads += [mjpeg_server.thread.native_id, mjpeg_stream.thread.native_id]
+    cpu_status = apply_cpu_settings(
+        perf_settings["cpu"],
+        {
+            "inference": [threading.get_native_id()] + inference_pool_threads(),
+            "capture": [camera.native_id],
+            "render": render_threads,
+        },
+    )
+
+    frames_counter = metrics.counter("stream_frames", "Frames shown")
+
+    frame_count = 0
+    last_results = None
 
     try:
         while True:
-            frame_start = time.time()
+            frame_start = now()
 
             # Capture frame
-            success, frame, error = get_frame(camera_thread, cap, use_picamera)
+            with metrics.timer("stream_capture_wait_seconds"):
+                success, frame, error, frame_info = get_frame(camera)
 
             if error:
                 st.error(f"Camera error: {error}")
@@ -123,15 +290,55 @@ def run_camera_stream(
                 st.warning("No more frames.")
                 break
 
+            process_start = now()
+
             # Run YOLO inference if enabled
             if yolo_enabled and model is not None:
-                annotated_frame, inference_time = run_inference(
-                    model, frame, confidence
+                infer = last_results is None or (
+                    (controller is None or controller.should_infer(frame_count))
+                    and (motion_gate is None or motion_gate.should_infer(frame))
                 )
-                inference_times.append(inference_time)
+
+                if infer:
+                    if tiler is not None:
+                        last_results, inference_time = tiler.predict(
+                            model, frame, confidence
+                        )
+                    else:
+                        imgsz = controller.imgsz if controller is not None else None
+                        last_results, inference_time = predict(
+                            model, frame, confidence, imgsz=imgsz
+                        )
+                    inference_times.append(inference_time)
+                    if motion_gate is not None:
+                        motion_gate.keyframe(frame, last_results, inference_time)
+                    annotated_frame = annotate(last_results, annotator=annotator)
+                    if controller is not None and controller.update(inference_times):
+                        inference_times.clear()
+                else:
+                    # Skipped frame: carry the last detections onto it
+                    if motion_gate is not None:
+                        last_results = motion_gate.carry(frame)
+                    annotated_frame = annotate(last_results, frame, annotator)
+
+                if exporter is not None:
+                    exporter.submit(
+                        last_results,
+                        frame_info.seq,
+                        frame_info.timestamp,
+                        source,
+                        tracked=not infer,
+                    )
             else:
                 annotated_frame = frame
 
+            metrics.histogram(
+                "stream_process_seconds", "Inference, tracking and annotation per frame"
+            ).record(now() - process_start)
+
+            frame_count += 1
+            frames_counter.inc()
+
             # Calculate FPS
             frame_times.append(frame_start)
 
@@ -149,68 +356,245 @@ def run_camera_stream(
                 if avg_inference_time > 0:
                     inference_fps = 1.0 / avg_inference_time
 
-            caption = f"{task} Result" if yolo_enabled else "Camera Feed"
-
-            # Center the video feed using columns
-            with result_frame.container():
-                col1, col2, col3 = st.columns([1, 5, 1])
-                with col2:
-                    st.image(
-                        annotated_frame,
-                        channels="BGR",
-                        caption=caption,
-                        width="stretch",
-                    )
+            render_start = now()
+
+            if mjpeg_stream is not None:
+                mjpeg_stream.publish(annotated_frame)
+            else:
+                caption = f"{task} Result" if yolo_enabled else "Camera Feed"
+
+                # Center the video feed using columns
+                with result_frame.container():
+                    col1, col2, col3 = st.columns([1, 5, 1])
+                    with col2:
+                        st.image(
+                            annotated_frame,
+                            channels="BGR",
+                            caption=caption,
+                            width="stretch",
+                        )
+
+            displayed = now()
+            metrics.histogram("stream_render_seconds", "Display time per frame").record(
+                displayed - render_start
+            )
+
+            # Capture-to-display latency of this frame
+            latencies.append(displayed - frame_info.timestamp)
+            metrics.histogram(
+                "stream_frame_latency_seconds", "Capture to display latency"
+            ).record(latencies[-1])
+
+            # The metrics panel is cheap next to st.image, but with MJPEG
+            # output it would dominate the loop, so refresh it less often
+            if mjpeg_stream is not None and frame_count % 10 != 0:
+                continue
+
+            captured, dropped = camera.stats()
+            status_lines = [
+                f"Capture → display latency: "
+                f"{sum(latencies) / len(latencies) * 1000:.0f} ms • "
+                f"{dropped}/{captured} frames dropped"
+            ]
+            status_lines.append(cpu_status)
+            if yolo_enabled and tiler is not None:
+                status_lines.append(tiler.status())
+            if yolo_enabled and controller is not None:
+                status_lines.append(controller.status())
+            if yolo_enabled and motion_gate is not None:
+                status_lines.append(motion_gate.status())
+            if mjpeg_stream is not None:
+                status_lines.append(mjpeg_stream.status())
+            if exporter is not None:
+                status_lines.append(exporter.status())
+            if recorder is not None:
+                status_lines.append(recorder.status())
 
             # Display metrics below the feed
             with stats_placeholder.container():
                 display_metrics(
-                    overall_fps, inference_fps, avg_inference_time, yolo_enabled, source, task
+                    overall_fps,
+                    inference_fps,
+                    avg_inference_time,
+                    yolo_enabled,
+                    source,
+                    task,
+                    status_lines,
                 )
 
     finally:
-        pass  # Camera cleanup handled by session state
-
+        # Camera cleanup handled by session state
+        if exporter is not None:
+            exporter.close()
+        if recorder is not None:
+            camera.recorder = None
+            recorder.close()
+
+
+def stop_multi_stream():
+    """Stop this session's multi-stream scheduler and free its sources."""
+    scheduler = st.session_state.get("multi_stream_scheduler")
+    if scheduler is not None:
+        scheduler.stop()
+        scheduler.join(timeout=5.0)
+    st.session_state.multi_stream_scheduler = None
+    st.session_state.multi_stream_config = None
+
+
+def run_multi_stream(
+    specs,
+    max_batch,
+    model_path,
+    confidence,
+    yolo_enabled,
+    stats_placeholder,
+    result_frame,
+    cpu_settings,
+):
+    """Run several sources through one shared model with batched inference."""
+    if not specs:
+        stop_multi_stream()
+        stats_placeholder.info("Add at least one stream in the sidebar.")
+        return
 
-def run_detection(source, confidence, model_path, task, yolo_enabled):
+    # Release the single-camera source so its device can be reused here
+    if st.session_state.get("camera") is not None:
+        cleanup_camera(st.session_state.camera)
+        st.session_state.camera = None
+
+    config = (tuple(specs), max_batch, model_path, confidence, yolo_enabled)
+    scheduler = st.session_state.get("multi_stream_scheduler")
+
+    # Restart the scheduler only when its configuration changed
+    if scheduler is None or st.session_state.get("multi_stream_config") != config:
+        stop_multi_stream()
+        model = load_model(model_path) if yolo_enabled else None
+        # The scheduler is a daemon thread; stop it once this session ends
+        ctx = get_script_run_ctx()
+        keep_running = partial(is_active_session, ctx.session_id) if ctx else None
+        scheduler = MultiStreamScheduler(
+            specs, model, confidence, max_batch, keep_running
+        )
+        scheduler.start()
+        st.session_state.multi_stream_scheduler = scheduler
+        st.session_state.multi_stream_config = config
+
+    cpu_status = None
+    while scheduler.is_alive():
+        # The scheduler starts its sources itself; pin once they are running
+        sources = [stream.source for stream in scheduler.streams]
+        if cpu_status is None and all(source.native_id for source in sources):
+            cpu_status = apply_cpu_settings(
+                cpu_settings,
+                {
+                    "inference": [scheduler.native_id] + inference_pool_threads(),
+                    "capture": [source.native_id for source in sources],
+                    "render": [
+                        threading.main_thread().native_id,
+                        threading.get_native_id(),
+                    ],
+                },
+            )
+
+        display_multi_stream(scheduler.outputs(), result_frame)
+
+        rows, avg_batch = scheduler.stats()
+        with stats_placeholder.container():
+            display_multi_stream_metrics(
+                rows, avg_batch, [cpu_status] if cpu_status else None
+            )
+
+        # Display runs at its own pace; inference happens on the scheduler thread
+        time.sleep(0.05)
+
+    if scheduler.error:
+        st.error(f"Multi-stream error: {scheduler.error}")
+
+
+def run_detection(source, confidence, model_path, task, yolo_enabled, perf_settings):
     """Run detection/segmentation/pose estimation on the selected source."""
 
     # Create display placeholders
     result_frame = st.empty()
     stats_placeholder = st.empty()
 
-    # Determine video source and camera type
-    use_picamera = source == "picamera" and IS_RASPBERRY_PI
+    # Leaving multi-stream mode: free its sources
+    if source != "multi_stream":
+        stop_multi_stream()
 
     # Handle video file source
     if source == "video":
-        video_path, process_button = upload_video()
+        upload, process_button = upload_video()
 
-        if video_path is None:
+        if upload is None:
             stats_placeholder.info("📁 Please upload a video file to continue.")
             return
 
-        stats_placeholder.success("✅ Video uploaded successfully!")
+        cache_key = result_key(upload["sha256"], model_path, confidence, task)
+        cached = get_result_cache().get(cache_key)
+
+        if cached is None:
+            stats_placeholder.success("✅ Video uploaded successfully!")
+        else:
+            stats_placeholder.success(
+                "✅ Video uploaded successfully! A result for these settings is cached."
+            )
 
         if not process_button:
             result_frame.info("👆 Click 'Process Video with YOLO' to start analysis.")
             return
 
+        # Same clip, model, confidence and task: show the stored result
+        if cached is not None:
+            cached_video, stats = cached
+            display_cached_video(cached_video, result_frame)
+            display_video_summary(stats_placeholder, stats, cached=True)
+            return
+
         # Clear placeholders before processing
         stats_placeholder.empty()
         result_frame.empty()
 
         process_video_file(
-            video_path, confidence, model_path, task, stats_placeholder, result_frame
+            upload["path"],
+            confidence,
+            model_path,
+            task,
+            stats_placeholder,
+            result_frame,
+            perf_settings,
+            cache_key,
+        )
+        return
+
+    # Several sources sharing one model
+    if source == "multi_stream":
+        specs, max_batch = setup_multi_stream_settings()
+        run_multi_stream(
+            specs,
+            max_batch,
+            model_path,
+            confidence,
+            yolo_enabled,
+            stats_placeholder,
+            result_frame,
+            perf_settings["cpu"],
         )
         return
 
     # Camera source handling
-    if use_picamera:
-        video_source = None
-    elif source in ["webcam", "picamera"]:
-        video_source = 0
-    else:
+    camera_options = None
+    if source == "replay":
+        camera_options = setup_replay_settings()
+        if camera_options is None:
+            stats_placeholder.info(
+                "📼 No recordings yet. Turn on 'Record camera' under ⚡ Performance "
+                "while a camera is running."
+            )
+            return
+    elif source == "picamera" and not IS_RASPBERRY_PI:
+        source = "webcam"
+    elif source not in ["webcam", "picamera", "test_pattern"]:
         stats_placeholder.info("Please select a video source.")
         return
 
@@ -219,18 +603,17 @@ def run_detection(source, confidence, model_path, task, yolo_enabled):
     if yolo_enabled:
         model = load_model(model_path)
         st.sidebar.success(f"✅ Model loaded: {task}")
+        render_model_registry_stats(get_model_registry().stats())
 
     # Setup camera
-    camera_thread, cap = setup_camera(video_source, use_picamera)
+    camera = setup_camera(source, camera_options)
 
-    if camera_thread is None and cap is None:
+    if camera is None:
         return  # Error already displayed
 
     # Run camera stream
     run_camera_stream(
-        camera_thread,
-        cap,
-        use_picamera,
+        camera,
         model,
         task,
         yolo_enabled,
@@ -238,6 +621,7 @@ def run_detection(source, confidence, model_path, task, yolo_enabled):
         stats_placeholder,
         result_frame,
         source,
+        perf_settings,
     )
 
 
@@ -251,7 +635,23 @@ def main():
 
     source, confidence, model_path, task, yolo_enabled = setup_sidebar()
 
-    run_detection(source, confidence, model_path, task, yolo_enabled)
+    perf_settings = setup_performance_settings()
+
+    if perf_settings["metrics_enabled"]:
+        try:
+            start_metrics_server(metrics, perf_settings["metrics_port"])
+        except OSError as e:
+            port = perf_settings["metrics_port"]
+            st.warning(f"Metrics endpoint disabled, port {port} unavailable: {e}")
+
+    if perf_settings["dump_metrics"]:
+        os.makedirs("metrics", exist_ok=True)
+        filename = f"metrics_{datetime.now():%Y%m%d_%H%M%S}.json"
+        path = os.path.join("metrics", filename)
+        metrics.dump_json(path)
+        st.sidebar.success(f"💾 Metrics saved to {path}")
+
+    run_detection(source, confidence, model_path, task, yolo_enabled, perf_settings)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""Compare the cost of results.plot() and FastAnnotator for each task type."""
+
+import argparse
+import time
+import cv2
+from ultralytics import YOLO
+from ultralytics.utils import ASSETS
+
+from modules.annotator import FastAnnotator
+from modules.ui_components import get_model_options
+
+TASKS = ["Detection", "Segmentation", "Pose Estimation"]
+
+
+def time_call(fn, iterations):
+    """Return the average time of `fn()` in milliseconds."""
+    fn()  # Warm-up
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start_time) / iterations * 1000
+
+
+def benchmark_task(task, model_index, image, confidence, iterations):
+    """Time both annotation paths on one set of results for `task`."""
+    model_path = get_model_options(task)[model_index]
+    model = YOLO(model_path)
+    results = model(image, conf=confidence, verbose=False)[0]
+
+    fast = FastAnnotator()
+    fast_no_labels = FastAnnotator(show_labels=False, show_masks=False)
+
+    return {
+        "task": task,
+        "model": model_path,
+        "objects": len(results.boxes) if results.boxes is not None else 0,
+        "plot": time_call(results.plot, iterations),
+        "fast": time_call(lambda: fast.draw(results), iterations),
+        "fast_minimal": time_call(lambda: fast_no_labels.draw(results), iterations),
+    }
+
+
+def print_results(rows, image_shape, iterations):
+    """Print a comparison table"""
+    print(
+        f"""
+Annotation Benchmark
+Image: {image_shape[1]}x{image_shape[0]}, Iterations: {iterations}
+{"-" * 78}
+{"Task":<16}{"Model":<18}{"Objects":>8}{"plot()":>11}{"Fast":>11}{"Fast (min)":>12}
+{"-" * 78}"""
+    )
+    for row in rows:
+        print(
+            f"{row['task']:<16}{row['model']:<18}{row['objects']:>8}"
+            f"{row['plot']:>9.2f}ms{row['fast']:>9.2f}ms{row['fast_minimal']:>10.2f}ms"
+        )
+    print(
+        f"""{"-" * 78}
+Fast (min) draws boxes only, without labels or masks."""
+    )
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark YOLO result annotation cost per task type."
+    )
+    parser.add_argument(
+        "--image",
+        type=str,
+        default=str(ASSETS / "bus.jpg"),
+        help="Image to run the models on",
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="Model size index: 0 = nano, 1 = small, 2 = medium",
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence")
+    parser.add_argument(
+        "--iterations", type=int, default=100, help="Timed iterations per path"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run the annotation benchmark for every task"""
+    args = parse_arguments()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        print(f"Error: Could not read image: {args.image}")
+        exit(1)
+
+    rows = [
+        benchmark_task(task, args.size, image, args.conf, args.iterations)
+        for task in TASKS
+    ]
+    print_results(rows, image.shape, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
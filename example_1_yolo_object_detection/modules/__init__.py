@@ -1 +1,9 @@
 """Modules package for YOLO11 Streamlit demo."""
+
+import os
+import sys
+
+# Make the helpers shared between the examples (edge_ai_common) importable
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
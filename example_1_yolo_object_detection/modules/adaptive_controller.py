@@ -0,0 +1,118 @@
+"""Adaptive input resolution and frame skipping for the live stream."""
+
+# Quality levels from best to cheapest: (imgsz, stride).
+# A stride of N runs YOLO on every Nth frame.
+ADAPTIVE_LEVELS = [
+    (640, 1),
+    (480, 1),
+    (320, 1),
+    (320, 2),
+    (320, 3),
+]
+
+# Levels for when the input size is set elsewhere, e.g. by tiled inference.
+# An imgsz of None leaves the input size alone.
+STRIDE_LEVELS = [
+    (None, 1),
+    (None, 2),
+    (None, 3),
+]
+
+
+class AdaptiveFpsController:
+    """
+    Pick the model input size and inference stride that meet a target FPS.
+
+    The controller reads the rolling inference time samples kept by the
+    camera loop. It steps down one level when the stream is too slow and
+    only steps back up when the faster level is predicted to still meet the
+    target with some headroom, so it does not flip-flop between two levels.
+    """
+
+    def __init__(
+        self,
+        target_fps,
+        levels=None,
+        hysteresis=0.15,
+        min_samples=10,
+        cooldown_frames=30,
+    ):
+        self.target_fps = target_fps
+        self.levels = levels or ADAPTIVE_LEVELS
+        self.hysteresis = hysteresis
+        self.min_samples = min_samples
+        self.cooldown_frames = cooldown_frames
+        self.level = 0
+        self.frames_since_change = 0
+
+    @property
+    def imgsz(self):
+        """Model input size for the current level."""
+        return self.levels[self.level][0]
+
+    @property
+    def stride(self):
+        """Run inference on every Nth frame for the current level."""
+        return self.levels[self.level][1]
+
+    def predicted_fps(self, avg_inference_time, level):
+        """Estimate the stream FPS at `level` from the current level's timing."""
+        current_imgsz, current_stride = self.levels[self.level]
+        imgsz, stride = self.levels[level]
+        # Inference cost scales roughly with the number of input pixels
+        scaled_time = avg_inference_time
+        if imgsz and current_imgsz:
+            scaled_time *= (imgsz / current_imgsz) ** 2
+        if scaled_time <= 0:
+            return float("inf")
+        return stride / scaled_time
+
+    def update(self, inference_times):
+        """
+        Update the level from the rolling inference times.
+
+        Returns:
+            bool: True if the level changed. The caller should clear
+            `inference_times`, since the old samples no longer describe
+            the new settings.
+        """
+        self.frames_since_change += 1
+
+        if self.target_fps <= 0 or len(inference_times) < self.min_samples:
+            return False
+        if self.frames_since_change < self.cooldown_frames:
+            return False
+
+        avg_inference_time = sum(inference_times) / len(inference_times)
+        current_fps = self.predicted_fps(avg_inference_time, self.level)
+
+        new_level = self.level
+        if (
+            current_fps < self.target_fps * (1 - self.hysteresis)
+            and self.level < len(self.levels) - 1
+        ):
+            new_level = self.level + 1
+        elif self.level > 0:
+            upgrade_fps = self.predicted_fps(avg_inference_time, self.level - 1)
+            if upgrade_fps >= self.target_fps * (1 + self.hysteresis):
+                new_level = self.level - 1
+
+        if new_level == self.level:
+            return False
+
+        self.level = new_level
+        self.frames_since_change = 0
+        return True
+
+    def should_infer(self, frame_count):
+        """Return True if YOLO should run on this frame."""
+        return frame_count % self.stride == 0
+
+    def status(self):
+        """Short description of the current settings for the metrics panel."""
+        size = f"imgsz {self.imgsz} • " if self.imgsz else ""
+        return (
+            f"Adaptive: target {self.target_fps:.0f} FPS • "
+            f"{size}stride {self.stride} "
+            f"(level {self.level + 1}/{len(self.levels)})"
+        )
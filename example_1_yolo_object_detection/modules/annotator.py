@@ -0,0 +1,166 @@
+"""Lightweight annotation of YOLO results for the live view."""
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.utils.plotting import colors
+
+# COCO keypoint skeleton (1-indexed pairs, same as Ultralytics)
+SKELETON = [
+    [16, 14],
+    [14, 12],
+    [17, 15],
+    [15, 13],
+    [12, 13],
+    [6, 12],
+    [7, 13],
+    [6, 7],
+    [6, 8],
+    [7, 9],
+    [8, 10],
+    [9, 11],
+    [2, 3],
+    [1, 2],
+    [1, 3],
+    [2, 4],
+    [3, 5],
+    [4, 6],
+    [5, 7],
+]
+
+
+class FastAnnotator:
+    """
+    Draw boxes, masks and keypoints straight from the result tensors.
+
+    Unlike `results.plot()` this draws into a buffer that is reused across
+    frames and blends all masks in a single pass. The returned image is
+    overwritten by the next call to `draw()`.
+    """
+
+    def __init__(self, show_labels=True, show_masks=True, mask_alpha=0.5, line_width=2):
+        self.show_labels = show_labels
+        self.show_masks = show_masks
+        self.mask_alpha = mask_alpha
+        self.line_width = line_width
+        self.buffer = None
+        self.color_buffer = None
+        self.blend_buffer = None
+        # Class colours matching results.plot(), in BGR
+        self.palette = np.array([colors(i, True) for i in range(256)], dtype=np.uint8)
+
+    def draw(self, results, frame=None):
+        """Annotate `frame` (or the results' own image) and return the buffer."""
+        image = results.orig_img if frame is None else frame
+        if self.buffer is None or self.buffer.shape != image.shape:
+            self.buffer = np.empty_like(image)
+            self.color_buffer = np.empty_like(image)
+            self.blend_buffer = np.empty_like(image)
+        np.copyto(self.buffer, image)
+
+        if results.boxes is None or len(results.boxes) == 0:
+            return self.buffer
+
+        classes = results.boxes.cls.int().cpu().numpy()
+
+        if self.show_masks and results.masks is not None:
+            self._draw_masks(results.masks.data, classes)
+
+        self._draw_boxes(results, classes)
+
+        if results.keypoints is not None:
+            self._draw_keypoints(results.keypoints.data.cpu().numpy())
+
+        return self.buffer
+
+    def _draw_masks(self, masks, classes):
+        """Blend every mask into the buffer in one vectorized pass."""
+        n, mask_h, mask_w = masks.shape
+        h, w = self.buffer.shape[:2]
+
+        # Label map: index of the last (topmost) mask covering each pixel
+        weights = torch.arange(1, n + 1, device=masks.device, dtype=masks.dtype)
+        labels = (masks * weights.view(-1, 1, 1)).amax(0).int().cpu().numpy()
+
+        # Remove the letterbox padding and scale up to the frame size
+        gain = min(mask_h / h, mask_w / w)
+        pad_x = int(round((mask_w - w * gain) / 2 - 0.1))
+        pad_y = int(round((mask_h - h * gain) / 2 - 0.1))
+        labels = labels[pad_y : mask_h - pad_y, pad_x : mask_w - pad_x]
+        labels = cv2.resize(
+            labels.astype(np.uint16), (w, h), interpolation=cv2.INTER_NEAREST
+        )
+
+        lut = np.zeros((n + 1, 3), dtype=np.uint8)
+        lut[1:] = self.palette[classes % len(self.palette)]
+        np.take(lut, labels, axis=0, out=self.color_buffer)
+        covered = labels > 0
+
+        cv2.addWeighted(
+            self.buffer,
+            1.0 - self.mask_alpha,
+            self.color_buffer,
+            self.mask_alpha,
+            0,
+            dst=self.blend_buffer,
+        )
+        np.copyto(self.buffer, self.blend_buffer, where=covered[..., None])
+
+    def _draw_boxes(self, results, classes):
+        """Draw boxes and, optionally, class labels with scores."""
+        boxes = results.boxes.xyxy.int().cpu().tolist()
+        scores = results.boxes.conf.cpu().tolist()
+
+        for (x1, y1, x2, y2), cls, score in zip(boxes, classes, scores):
+            color = self.palette[cls % len(self.palette)].tolist()
+            cv2.rectangle(self.buffer, (x1, y1), (x2, y2), color, self.line_width)
+
+            if self.show_labels:
+                label = f"{results.names[cls]} {score:.2f}"
+                (text_w, text_h), baseline = cv2.getTextSize(
+                    label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1
+                )
+                top = max(y1 - text_h - baseline, 0)
+                cv2.rectangle(
+                    self.buffer,
+                    (x1, top),
+                    (x1 + text_w, top + text_h + baseline),
+                    color,
+                    -1,
+                )
+                cv2.putText(
+                    self.buffer,
+                    label,
+                    (x1, top + text_h),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    (255, 255, 255),
+                    1,
+                    cv2.LINE_AA,
+                )
+
+    def _draw_keypoints(self, keypoints, conf_threshold=0.5):
+        """Draw pose keypoints and the skeleton between them."""
+        for person in keypoints:
+            visible = (
+                person[:, 2] >= conf_threshold
+                if person.shape[1] == 3
+                else np.ones(len(person), dtype=bool)
+            )
+            points = person[:, :2].astype(int).tolist()
+
+            if len(points) == 17:
+                for a, b in SKELETON:
+                    if visible[a - 1] and visible[b - 1]:
+                        cv2.line(
+                            self.buffer,
+                            tuple(points[a - 1]),
+                            tuple(points[b - 1]),
+                            (255, 128, 0),
+                            self.line_width,
+                            cv2.LINE_AA,
+                        )
+
+            for i, (x, y) in enumerate(points):
+                if visible[i]:
+                    cv2.circle(self.buffer, (x, y), 4, (0, 255, 255), -1, cv2.LINE_AA)
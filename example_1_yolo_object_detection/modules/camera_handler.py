@@ -1,148 +1,88 @@
-"""Camera handling for Pi Camera and Webcam."""
+"""Camera handling for Pi Camera, Webcam, the test pattern and recordings."""
 
-import time
-import threading
-from queue import Queue, Empty
-import cv2
 import streamlit as st
-from modules.device_config import IS_RASPBERRY_PI, CAMERA_CONFIG
-
-if IS_RASPBERRY_PI:
-    from picamera2 import Picamera2
-
-
-class PiCameraThread(threading.Thread):
-    """Thread-safe wrapper for Picamera2 to avoid cleanup issues."""
-
-    def __init__(self):
-        super().__init__(daemon=True)
-        self.frame_queue = Queue(maxsize=2)
-        self.stop_event = threading.Event()
-        self.camera = None
-        self.error = None
-
-    def run(self):
-        """Run the camera capture loop in a separate thread."""
-        try:
-            config_settings = CAMERA_CONFIG["pi_camera"]
-            self.camera = Picamera2()
-            config = self.camera.create_preview_configuration(
-                main={
-                    "format": config_settings["format"],
-                    "size": config_settings["size"],
-                }
-            )
-            self.camera.configure(config)
-            self.camera.start()
-            self.camera.set_controls({"AwbEnable": True, "AeEnable": True})
-            time.sleep(config_settings["warmup_time"])
-
-            while not self.stop_event.is_set():
-                try:
-                    frame = self.camera.capture_array()
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                    try:
-                        self.frame_queue.put(frame, block=False)
-                    except Exception:
-                        pass  # Queue full, skip frame
-                except Exception as e:
-                    if not self.stop_event.is_set():
-                        self.error = str(e)
-                    break
-
-        except Exception as e:
-            self.error = str(e)
-        finally:
-            if self.camera:
-                try:
-                    self.camera.stop()
-                    time.sleep(0.3)
-                    self.camera.close()
-                except Exception:
-                    pass
-
-    def get_frame(self, timeout=0.5):
-        """Get the latest frame from the queue."""
-        try:
-            return self.frame_queue.get(timeout=timeout)
-        except Empty:
-            return None
-
-    def stop(self):
-        """Signal the thread to stop."""
-        self.stop_event.set()
-
-
-def initialize_camera(source, use_picamera):
-    """Initialize camera based on source type."""
-    if use_picamera:
-        camera_thread = PiCameraThread()
-        camera_thread.start()
-        time.sleep(2.5)
-
-        if camera_thread.error:
-            st.error(f"Could not initialize Pi Camera: {camera_thread.error}")
-            camera_thread.stop()
-            return None, None
-
-        return camera_thread, None
+from modules.device_config import CAMERA_CONFIG
+from modules.capture import PiCameraSource, OpenCVSource, FakeCameraSource
+from modules.recording import ReplaySource
+
+
+def initialize_camera(source, options=None):
+    """
+    Start a threaded capture source and wait for its first frame.
+
+    For "replay", `options` is (recording_path, realtime, loop).
+    """
+    if source == "replay":
+        camera = ReplaySource(*options)
+        timeout = 3.0
+    elif source == "picamera":
+        camera = PiCameraSource(CAMERA_CONFIG["pi_camera"])
+        timeout = CAMERA_CONFIG["pi_camera"]["warmup_time"] + 3.0
+    elif source == "test_pattern":
+        settings = CAMERA_CONFIG["test_pattern"]
+        camera = FakeCameraSource(
+            settings["width"], settings["height"], settings["fps"]
+        )
+        timeout = 3.0
     else:
-        # Use OpenCV VideoCapture for webcam/video
-        cap = cv2.VideoCapture(source)
+        settings = CAMERA_CONFIG["webcam"]
+        camera = OpenCVSource(settings["source"], settings["width"], settings["height"])
+        timeout = 5.0
 
-        if not cap.isOpened():
-            st.error(f"Could not open video source: {source}")
-            return None, None
+    camera.start()
 
-        return None, cap
+    if not camera.wait_ready(timeout):
+        reason = camera.error or "no frames received"
+        st.error(f"Could not initialize camera ({source}): {reason}")
+        cleanup_camera(camera)
+        return None
 
+    return camera
 
-def get_frame(camera_thread, cap, use_picamera):
-    """Get frame from camera (abstracts Pi Camera vs Webcam)."""
-    if use_picamera:
-        frame = camera_thread.get_frame(timeout=1.0)
-        success = frame is not None
-        error = camera_thread.error if camera_thread else None
-        return success, frame, error
-    else:
-        success, frame = cap.read()
-        return success, frame, None
 
+def get_frame(camera, timeout=1.0):
+    """
+    Get the newest frame from the camera.
+
+    The frame stays valid until the next call, so callers that keep it
+    longer must copy it.
+
+    Returns:
+        tuple: (success, frame, error, info)
+    """
+    frame, info = camera.read(timeout=timeout)
+    success = frame is not None
+    return success, frame, camera.error, info
 
-def cleanup_camera(camera_thread, cap):
+
+def cleanup_camera(camera):
     """Clean up camera resources."""
-    if camera_thread:
-        camera_thread.stop()
-        camera_thread.join(timeout=3.0)
-    if cap:
-        cap.release()
+    if camera:
+        camera.stop()
+        camera.join(timeout=3.0)
 
 
-def setup_camera(video_source, use_picamera):
+def setup_camera(source, options=None):
     """Get camera from session state or initialize if needed."""
     # Initialize session state for camera
-    if "camera_initialized" not in st.session_state:
-        st.session_state.camera_initialized = False
-        st.session_state.camera_thread = None
-        st.session_state.cap = None
-        st.session_state.use_picamera = None
-
-    # Initialize camera (only once or when source changes)
-    if (
-        not st.session_state.camera_initialized
-        or st.session_state.use_picamera != use_picamera
-    ):
-        if st.session_state.camera_initialized:
-            cleanup_camera(st.session_state.camera_thread, st.session_state.cap)
-
-        camera_thread, cap = initialize_camera(video_source, use_picamera)
-
-        if camera_thread is None and cap is None:
-            return None, None  # Error already displayed
-
-        st.session_state.camera_thread = camera_thread
-        st.session_state.cap = cap
-        st.session_state.camera_initialized = True
-        st.session_state.use_picamera = use_picamera
-
-    return st.session_state.camera_thread, st.session_state.cap
+    if "camera" not in st.session_state:
+        st.session_state.camera = None
+        st.session_state.camera_source = None
+
+    camera = st.session_state.camera
+
+    # Initialize camera (only once, when the source changes, or after it died)
+    key = (source, options)
+    if camera is None or st.session_state.camera_source != key or camera.finished:
+        cleanup_camera(camera)
+        st.session_state.camera = None
+
+        camera = initialize_camera(source, options)
+
+        if camera is None:
+            return None  # Error already displayed
+
+        st.session_state.camera = camera
+        st.session_state.camera_source = key
+
+    return camera
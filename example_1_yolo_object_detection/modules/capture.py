@@ -0,0 +1,380 @@
+"""Threaded frame capture with a single-slot "latest frame wins" buffer."""
+
+import os
+import threading
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+FrameInfo = namedtuple("FrameInfo", ["seq", "timestamp", "dropped"])
+
+# Picamera2 names formats by the order of the 32-bit word, so "RGB888" is
+# already B, G, R in memory (what OpenCV and YOLO expect). Any other format
+# needs a conversion, which is done straight into the capture buffer.
+PI_FORMAT_CONVERSIONS = {
+    "RGB888": None,
+    "BGR888": cv2.COLOR_RGB2BGR,
+    "XRGB8888": cv2.COLOR_BGRA2BGR,
+    "XBGR8888": cv2.COLOR_RGBA2BGR,
+}
+
+
+class LatestFrameBuffer:
+    """
+    Preallocated triple buffer that always hands out the newest frame.
+
+    The capture thread writes into a slot that is neither the newest frame
+    nor the one the consumer is reading, so no frame is ever copied or
+    allocated after start-up. A frame that is overwritten before anyone
+    reads it is counted as dropped.
+    """
+
+    def __init__(self, shape, dtype=np.uint8):
+        self.slots = [np.empty(shape, dtype=dtype) for _ in range(3)]
+        self.condition = threading.Condition()
+        self.latest = None
+        self.reading = None
+        self.writing = None
+        self.latest_consumed = True
+        self.closed = False
+
+        self.seq = 0
+        self.timestamp = 0.0
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    @property
+    def shape(self):
+        """Shape of the frames held in the buffer."""
+        return self.slots[0].shape
+
+    def begin_write(self):
+        """Return a free slot for the producer to fill."""
+        with self.condition:
+            self.writing = next(
+                i for i in range(3) if i != self.latest and i != self.reading
+            )
+            return self.slots[self.writing]
+
+    def commit(self, timestamp):
+        """
+        Publish the slot returned by `begin_write()` as the newest frame.
+
+        Returns:
+            bool: True if the previous frame was overwritten without being read
+        """
+        with self.condition:
+            dropped = not self.latest_consumed
+            if dropped:
+                self.frames_dropped += 1
+            self.latest = self.writing
+            self.writing = None
+            self.latest_consumed = False
+            self.seq += 1
+            self.timestamp = timestamp
+            self.frames_written += 1
+            self.condition.notify_all()
+            return dropped
+
+    def read(self, last_seq, timeout):
+        """
+        Wait for a frame newer than `last_seq`.
+
+        The returned array stays valid until the next call to `read()`.
+
+        Returns:
+            tuple: (frame, FrameInfo), or (None, None) on timeout or close
+        """
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: self.seq > last_seq or self.closed, timeout=timeout
+            )
+            if not ready or self.seq <= last_seq:
+                return None, None
+            self.reading = self.latest
+            self.latest_consumed = True
+            self.condition.notify_all()
+            info = FrameInfo(self.seq, self.timestamp, self.frames_dropped)
+            return self.slots[self.reading], info
+
+    def wait_consumed(self, timeout):
+        """Wait until the newest frame has been read; returns False on timeout."""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.latest_consumed or self.closed, timeout=timeout
+            )
+
+    def close(self):
+        """Wake up any waiting reader; no more frames will arrive."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class FrameSource(threading.Thread):
+    """
+    Base class for threaded capture sources.
+
+    Subclasses implement `open()`, `capture(out)` and `close()`. `capture`
+    fills `out` (or allocates a frame when `out` is None) and returns it,
+    or returns None at the end of the stream.
+
+    Setting `recorder` (a FrameRecorder) stores every captured frame.
+    """
+
+    def __init__(self, name):
+        super().__init__(daemon=True, name=name)
+        self.stop_event = threading.Event()
+        self.ready_event = threading.Event()
+        self.buffer = None
+        self.error = None
+        self.finished = False
+        self.last_read_seq = 0
+        self.recorder = None
+
+    def open(self):
+        """Open the underlying device."""
+
+    def capture(self, out):
+        """Capture one frame into `out`."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the underlying device."""
+
+    def run(self):
+        """Run the capture loop in a separate thread."""
+        # Process-wide totals over every source, whichever session started it
+        frames_captured = metrics.counter(
+            "camera_frames_captured", "Frames captured by all sources"
+        )
+        frames_dropped = metrics.counter(
+            "camera_frames_dropped", "Frames overwritten before they were processed"
+        )
+        try:
+            self.open()
+            while not self.stop_event.is_set():
+                if self.buffer is None:
+                    frame = self.capture(None)
+                    if frame is None:
+                        break
+                    timestamp = now()
+                    self.buffer = LatestFrameBuffer(frame.shape, frame.dtype)
+                    slot = self.buffer.begin_write()
+                    np.copyto(slot, frame)
+                    self.ready_event.set()
+                else:
+                    slot = self.buffer.begin_write()
+                    frame = self.capture(slot)
+                    if frame is None:
+                        break
+                    timestamp = now()
+                    if frame is not slot:
+                        # The backend allocated a new array instead of filling the slot
+                        if frame.shape != slot.shape or frame.dtype != slot.dtype:
+                            raise RuntimeError(
+                                f"Frame format changed from {slot.shape} {slot.dtype} "
+                                f"to {frame.shape} {frame.dtype}"
+                            )
+                        np.copyto(slot, frame)
+                if self.buffer.commit(timestamp):
+                    frames_dropped.inc()
+                frames_captured.inc()
+
+                # The published slot is not rewritten until the next capture
+                recorder = self.recorder
+                if recorder is not None:
+                    recorder.write(slot, timestamp)
+        except Exception as e:
+            if not self.stop_event.is_set():
+                self.error = str(e)
+        finally:
+            self.finished = True
+            self.ready_event.set()
+            if self.buffer is not None:
+                self.buffer.close()
+            try:
+                self.close()
+            except Exception:
+                pass
+
+    def wait_ready(self, timeout):
+        """Wait for the first frame; returns False on error or timeout."""
+        return self.ready_event.wait(timeout) and self.buffer is not None
+
+    def read(self, timeout=1.0):
+        """
+        Get the newest frame not yet returned by `read()`.
+
+        Returns:
+            tuple: (frame, FrameInfo), or (None, None) if none arrived in time
+        """
+        if self.buffer is None and not self.ready_event.wait(timeout):
+            return None, None
+        if self.buffer is None:
+            return None, None
+
+        frame, info = self.buffer.read(self.last_read_seq, timeout)
+        if info is not None:
+            self.last_read_seq = info.seq
+        return frame, info
+
+    def stats(self):
+        """
+        Capture counters.
+
+        Returns:
+            tuple: (frames_captured, frames_dropped)
+        """
+        if self.buffer is None:
+            return 0, 0
+        return self.buffer.frames_written, self.buffer.frames_dropped
+
+    def stop(self):
+        """Signal the thread to stop."""
+        self.stop_event.set()
+
+
+class PiCameraSource(FrameSource):
+    """Pi Camera capture through Picamera2, without colour conversion when possible."""
+
+    def __init__(self, config_settings):
+        super().__init__(name="PiCameraSource")
+        self.config_settings = config_settings
+        self.camera = None
+        self.conversion = None
+
+    def open(self):
+        pixel_format = self.config_settings["format"]
+        if pixel_format not in PI_FORMAT_CONVERSIONS:
+            supported = ", ".join(PI_FORMAT_CONVERSIONS)
+            raise ValueError(
+                f"Unsupported Pi camera format {pixel_format!r} (use {supported})"
+            )
+        self.conversion = PI_FORMAT_CONVERSIONS[pixel_format]
+
+        from picamera2 import Picamera2
+
+        self.camera = Picamera2()
+        config = self.camera.create_preview_configuration(
+            main={
+                "format": self.config_settings["format"],
+                "size": self.config_settings["size"],
+            }
+        )
+        self.camera.configure(config)
+        self.camera.start()
+        self.camera.set_controls({"AwbEnable": True, "AeEnable": True})
+        time.sleep(self.config_settings["warmup_time"])
+
+    def capture(self, out):
+        frame = self.camera.capture_array()
+        if self.conversion is not None:
+            return cv2.cvtColor(frame, self.conversion, dst=out)
+        if out is None:
+            return frame
+        np.copyto(out, frame)
+        return out
+
+    def close(self):
+        if self.camera:
+            self.camera.stop()
+            time.sleep(0.3)
+            self.camera.close()
+
+
+class OpenCVSource(FrameSource):
+    """
+    Webcam, RTSP stream or video file capture through OpenCV.
+
+    Files are paced to their native frame rate (otherwise the buffer would
+    skip most of them) and can optionally loop.
+    """
+
+    def __init__(self, source, width=None, height=None, loop=False):
+        super().__init__(name=f"OpenCVSource({source})")
+        self.source = source
+        self.width = width
+        self.height = height
+        self.loop = loop
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.cap = None
+        self.frame_interval = 0.0
+        self.next_frame_time = 0.0
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video source: {self.source}")
+
+        if self.width and self.height and not self.is_file:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            # Keep the driver queue short so frames are not stale
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if self.is_file:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30
+            self.next_frame_time = now()
+
+    def capture(self, out):
+        if self.is_file:
+            delay = self.next_frame_time - now()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time += self.frame_interval
+
+        success, frame = self.cap.read(out)
+        if not success and self.is_file and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read(out)
+        return frame if success else None
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+
+
+class FakeCameraSource(FrameSource):
+    """Synthetic moving test pattern for running without a camera."""
+
+    def __init__(self, width=800, height=600, fps=30):
+        super().__init__(name="FakeCameraSource")
+        self.width = width
+        self.height = height
+        self.frame_interval = 1.0 / fps
+        self.next_frame_time = 0.0
+        self.frame_count = 0
+
+    def open(self):
+        self.next_frame_time = now()
+
+    def capture(self, out):
+        delay = self.next_frame_time - now()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time += self.frame_interval
+
+        if out is None:
+            out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        out[:] = (40, 40, 40)
+        x = int((self.frame_count * 4) % (self.width - 120))
+        y = self.height // 2 - 60
+        cv2.rectangle(out, (x, y), (x + 120, y + 120), (247, 211, 88), -1)
+        cv2.putText(
+            out,
+            f"Test pattern - frame {self.frame_count}",
+            (20, 40),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1.0,
+            (255, 255, 255),
+            2,
+        )
+        self.frame_count += 1
+        return out
@@ -0,0 +1,281 @@
+"""Inference thread count and CPU affinity for the pipeline stages."""
+
+import argparse
+import os
+import sys
+import threading
+from contextlib import contextmanager
+import cv2
+
+CPU_PRESETS = ["Default", "Auto", "Custom"]
+
+STAGES = ["inference", "capture", "render"]
+
+# Every CPU this process may use, before any pinning by the app
+if hasattr(os, "sched_getaffinity"):
+    AVAILABLE_CPUS = sorted(os.sched_getaffinity(0))
+else:
+    AVAILABLE_CPUS = list(range(os.cpu_count() or 1))
+
+# PyTorch and OpenCV thread counts before the app changed them
+_default_threads = None
+
+# Native ids of the inference libraries' compute pool threads
+_pool_threads = set()
+_pool_lock = threading.Lock()
+
+
+def affinity_supported():
+    """Whether threads can be pinned to CPUs on this platform (Linux only)."""
+    return hasattr(os, "sched_setaffinity")
+
+
+def detect_core_clusters():
+    """
+    Group the available CPUs by maximum clock frequency, fastest first.
+
+    On big.LITTLE boards this gives the big cores first and the little
+    cores last. Symmetric CPUs, or systems without cpufreq, give one cluster.
+    """
+    clusters = {}
+    for cpu in AVAILABLE_CPUS:
+        path = f"/sys/devices/system/cpu/cpu{cpu}/cpufreq/cpuinfo_max_freq"
+        try:
+            with open(path) as f:
+                max_freq_khz = int(f.read())
+        except (OSError, ValueError):
+            max_freq_khz = 0
+        clusters.setdefault(max_freq_khz, []).append(cpu)
+    return [(freq, clusters[freq]) for freq in sorted(clusters, reverse=True)]
+
+
+def describe_clusters():
+    """Short description of the CPU clusters for the sidebar."""
+    clusters = detect_core_clusters()
+    if len(clusters) == 1:
+        return f"{len(AVAILABLE_CPUS)} CPUs, one cluster"
+    parts = [
+        f"{format_cpu_list(cpus)} @ {freq / 1e6:.1f} GHz" for freq, cpus in clusters
+    ]
+    return f"{len(AVAILABLE_CPUS)} CPUs, big.LITTLE: " + ", ".join(parts)
+
+
+def parse_cpu_list(text):
+    """
+    Parse a CPU list such as "0-3,6".
+
+    Returns:
+        list: Sorted CPU numbers, or None for an empty string (not pinned)
+
+    Raises:
+        ValueError: If the text is malformed or names unavailable CPUs
+    """
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+
+    if not cpus:
+        return None
+    unavailable = cpus - set(AVAILABLE_CPUS)
+    if unavailable:
+        raise ValueError(
+            f"CPU {format_cpu_list(unavailable)} is not available "
+            f"(available: {format_cpu_list(AVAILABLE_CPUS)})"
+        )
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    """Format CPU numbers as a compact list such as "0-3,6"."""
+    if not cpus:
+        return ""
+    cpus = sorted(cpus)
+    ranges = []
+    start = previous = cpus[0]
+    for cpu in cpus[1:] + [None]:
+        if cpu is not None and cpu == previous + 1:
+            previous = cpu
+            continue
+        ranges.append(str(start) if start == previous else f"{start}-{previous}")
+        if cpu is not None:
+            start = previous = cpu
+    return ",".join(ranges)
+
+
+def default_plan():
+    """Library defaults: no thread limit and nothing pinned."""
+    return {"threads": 0, "inference": "", "capture": "", "render": ""}
+
+
+def auto_plan():
+    """
+    Split the cores between the stages.
+
+    Inference gets every cluster but the slowest on big.LITTLE boards, or
+    all cores but one on symmetric CPUs, with one thread per core. Capture
+    and render share the remaining cores, so they never preempt inference.
+    """
+    clusters = detect_core_clusters()
+    if len(clusters) > 1:
+        inference = [cpu for _, cpus in clusters[:-1] for cpu in cpus]
+        other = clusters[-1][1]
+    elif len(AVAILABLE_CPUS) >= 3:
+        inference = AVAILABLE_CPUS[1:]
+        other = AVAILABLE_CPUS[:1]
+    else:
+        return default_plan()
+
+    return {
+        "threads": len(inference),
+        "inference": format_cpu_list(inference),
+        "capture": format_cpu_list(other),
+        "render": format_cpu_list(other),
+    }
+
+
+def parse_cli_args(argv=None):
+    """
+    Read CPU options given to the app after `--`, e.g.
+
+        streamlit run YOLO11_Example.py -- --threads 3 --inference-cpus 1-3
+
+    Unknown arguments are ignored.
+
+    Returns:
+        tuple: (preset, plan) used as the sidebar defaults
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--cpu-preset", choices=[p.lower() for p in CPU_PRESETS], default=None
+    )
+    parser.add_argument("--threads", type=int, default=None)
+    for stage in STAGES:
+        parser.add_argument(f"--{stage}-cpus", type=str, default=None)
+    args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    plan = auto_plan()
+    custom = False
+    if args.threads is not None:
+        plan["threads"] = args.threads
+        custom = True
+    for stage in STAGES:
+        value = getattr(args, f"{stage}_cpus")
+        if value is not None:
+            plan[stage] = value
+            custom = True
+
+    if args.cpu_preset is not None:
+        preset = args.cpu_preset.capitalize()
+    else:
+        preset = "Custom" if custom else "Default"
+    return preset, plan
+
+
+def set_inference_threads(threads):
+    """
+    Set the PyTorch and OpenCV thread counts; 0 restores the defaults.
+
+    The counts are process-wide, so they apply to every session.
+    """
+    import torch
+
+    global _default_threads
+    if _default_threads is None:
+        _default_threads = (torch.get_num_threads(), cv2.getNumThreads())
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+        cv2.setNumThreads(threads)
+    else:
+        torch.set_num_threads(_default_threads[0])
+        cv2.setNumThreads(_default_threads[1])
+
+
+def pin_thread(native_id, cpus):
+    """
+    Pin one OS thread to `cpus` (None allows every available CPU).
+
+    Returns:
+        bool: True if the affinity was set
+    """
+    if not affinity_supported() or native_id is None:
+        return False
+    try:
+        os.sched_setaffinity(native_id, cpus or AVAILABLE_CPUS)
+        return True
+    except OSError:
+        return False  # The thread already exited
+
+
+def _task_ids():
+    """Native ids of every OS thread of this process (empty if unknown)."""
+    try:
+        return {int(tid) for tid in os.listdir("/proc/self/task")}
+    except OSError:
+        return set()
+
+
+@contextmanager
+def record_pool_threads():
+    """
+    Remember the native threads started inside the block as pool threads.
+
+    Wrap the loading and warm-up of a model with it: the compute pools of
+    PyTorch (OpenMP) and ONNX Runtime start there. Threads started later
+    by an already pinned inference thread inherit its CPUs, so they do not
+    need to be recorded.
+    """
+    before = _task_ids()
+    try:
+        yield
+    finally:
+        python_ids = {t.native_id for t in threading.enumerate()}
+        with _pool_lock:
+            _pool_threads.update(_task_ids() - before - python_ids)
+
+
+def inference_pool_threads():
+    """
+    Native ids of the recorded pool threads that are still running.
+
+    Capture threads of libcamera, V4L2 or FFmpeg are not included, so they
+    can be pinned to other CPUs than inference.
+    """
+    alive = _task_ids()
+    with _pool_lock:
+        _pool_threads.intersection_update(alive)
+        return sorted(_pool_threads)
+
+
+def apply_cpu_settings(cpu_settings, stage_threads):
+    """
+    Set the inference thread count and pin the threads of each stage.
+
+    Args:
+        cpu_settings: dict with "threads" and a CPU list (or None) per stage
+        stage_threads: dict of stage name to the native ids of its threads
+
+    Returns:
+        str: Short description for the metrics panel
+    """
+    set_inference_threads(cpu_settings["threads"])
+
+    pinned = []
+    for stage in STAGES:
+        cpus = cpu_settings[stage]
+        for native_id in stage_threads.get(stage, []):
+            pin_thread(native_id, cpus)
+        if cpus and affinity_supported():
+            pinned.append(f"{stage} → CPU {format_cpu_list(cpus)}")
+
+    threads = cpu_settings["threads"] or "default"
+    return f"CPU: {threads} inference threads • " + (
+        " • ".join(pinned) if pinned else "no pinning"
+    )
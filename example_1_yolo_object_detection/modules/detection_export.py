@@ -0,0 +1,294 @@
+"""Asynchronous export of per-frame detections to JSONL or Parquet."""
+
+import json
+import os
+import threading
+from datetime import datetime
+from queue import Queue, Empty, Full
+import cv2
+import numpy as np
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+EXPORT_FORMATS = ["jsonl", "parquet"]
+
+
+def extract_record(results, frame_index, timestamp, stream, tracked=False):
+    """
+    Copy the detections out of a result into plain NumPy arrays.
+
+    This is the only export work done on the inference loop; encoding and
+    writing happen on the exporter thread.
+    """
+    boxes = results.boxes
+    record = {
+        "frame": int(frame_index),
+        "timestamp": float(timestamp),
+        "stream": stream,
+        "tracked": tracked,
+        "height": int(results.orig_shape[0]),
+        "width": int(results.orig_shape[1]),
+        "boxes": np.empty((0, 4), dtype=np.float32),
+        "classes": np.empty(0, dtype=np.int32),
+        "scores": np.empty(0, dtype=np.float32),
+        "masks": None,
+        "keypoints": None,
+    }
+
+    if boxes is not None and len(boxes) > 0:
+        record["boxes"] = boxes.xyxy.cpu().numpy().astype(np.float32)
+        record["classes"] = boxes.cls.cpu().numpy().astype(np.int32)
+        record["scores"] = boxes.conf.cpu().numpy().astype(np.float32)
+        if results.masks is not None:
+            record["masks"] = (results.masks.data > 0.5).cpu().numpy()
+        if results.keypoints is not None:
+            record["keypoints"] = results.keypoints.data.cpu().numpy()
+
+    return record
+
+
+def encode_rle(mask):
+    """Run-length encode a boolean mask in column-major order (COCO style)."""
+    pixels = mask.ravel(order="F")
+    changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    boundaries = np.concatenate(([0], changes, [pixels.size]))
+    counts = np.diff(boundaries)
+    # Counts always start with a run of zeros, which may be empty
+    if pixels.size and pixels[0]:
+        counts = np.concatenate(([0], counts))
+    return counts.astype(np.int32).tolist()
+
+
+def masks_to_frame(masks, height, width):
+    """
+    Map (N, h, w) masks from letterboxed model input space to frame pixels.
+
+    The letterbox padding is cropped off and the masks are resized to the
+    frame, so they line up with the exported boxes.
+    """
+    mask_height, mask_width = masks.shape[1:]
+    if (mask_height, mask_width) == (height, width):
+        return masks
+
+    # Same rounding as the letterbox, which centers the scaled frame
+    gain = min(mask_height / height, mask_width / width)
+    pad_y = (mask_height - height * gain) / 2
+    pad_x = (mask_width - width * gain) / 2
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    bottom = int(round(mask_height - pad_y + 0.1))
+    right = int(round(mask_width - pad_x + 0.1))
+
+    scaled = np.empty((len(masks), height, width), dtype=bool)
+    for i, mask in enumerate(masks[:, top:bottom, left:right]):
+        resized = cv2.resize(
+            mask.astype(np.uint8), (width, height), interpolation=cv2.INTER_NEAREST
+        )
+        scaled[i] = resized > 0
+    return scaled
+
+
+def serialize_record(record):
+    """Turn an extracted record into a flat, columnar row."""
+    masks = record["masks"]
+    if masks is not None:
+        masks = masks_to_frame(masks, record["height"], record["width"])
+    keypoints = record["keypoints"]
+    has_masks = masks is not None
+    has_keypoints = keypoints is not None
+    return {
+        "frame": record["frame"],
+        "timestamp": record["timestamp"],
+        "stream": record["stream"],
+        "tracked": record["tracked"],
+        "height": record["height"],
+        "width": record["width"],
+        "boxes": np.round(record["boxes"], 1).ravel().tolist(),
+        "classes": record["classes"].tolist(),
+        "scores": np.round(record["scores"], 3).tolist(),
+        "mask_height": int(masks.shape[1]) if has_masks else 0,
+        "mask_width": int(masks.shape[2]) if has_masks else 0,
+        "mask_counts": [encode_rle(m) for m in masks] if has_masks else [],
+        "num_keypoints": int(keypoints.shape[1]) if has_keypoints else 0,
+        "keypoints": (np.round(keypoints, 2).ravel().tolist() if has_keypoints else []),
+    }
+
+
+class JsonlWriter:
+    """Append rows to a JSON Lines file."""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, rows):
+        self.file.write("".join(json.dumps(row) + "\n" for row in rows))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Append rows to a Parquet file, one row group per flush."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                ("frame", pa.int64()),
+                ("timestamp", pa.float64()),
+                ("stream", pa.string()),
+                ("tracked", pa.bool_()),
+                ("height", pa.int32()),
+                ("width", pa.int32()),
+                ("boxes", pa.list_(pa.float32())),
+                ("classes", pa.list_(pa.int32())),
+                ("scores", pa.list_(pa.float32())),
+                ("mask_height", pa.int32()),
+                ("mask_width", pa.int32()),
+                ("mask_counts", pa.list_(pa.list_(pa.int32()))),
+                ("num_keypoints", pa.int32()),
+                ("keypoints", pa.list_(pa.float32())),
+            ]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+class DetectionExporter(threading.Thread):
+    """
+    Write detections on a background thread.
+
+    `submit()` never blocks: records go into a bounded queue and are
+    dropped (and counted) if the writer falls behind. The writer encodes
+    and flushes them in batches.
+    """
+
+    def __init__(
+        self,
+        path,
+        export_format="jsonl",
+        max_queue=256,
+        batch_size=64,
+        flush_interval=1.0,
+    ):
+        super().__init__(daemon=True, name="DetectionExporter")
+        self.path = path
+        if export_format == "parquet":
+            self.writer = ParquetWriter(path)
+        else:
+            self.writer = JsonlWriter(path)
+        self.queue = Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stop_event = threading.Event()
+
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.serialize_time = 0.0
+        self.write_time = 0.0
+        self.error = None
+
+    def submit(self, results, frame_index, timestamp, stream, tracked=False):
+        """Queue the detections of one frame for export, unless the writer failed."""
+        if self.error is not None or not self.is_alive():
+            return
+        self.submitted += 1
+        record = extract_record(results, frame_index, timestamp, stream, tracked)
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+            metrics.counter(
+                "export_records_dropped", "Frames dropped by a full export queue"
+            ).inc()
+
+    def run(self):
+        """Collect records and flush them in batches until closed."""
+        batch = []
+        last_flush = now()
+
+        try:
+            while not self.stop_event.is_set() or not self.queue.empty():
+                try:
+                    batch.append(self.queue.get(timeout=0.1))
+                except Empty:
+                    pass
+
+                due = now() - last_flush >= self.flush_interval
+                if batch and (len(batch) >= self.batch_size or due):
+                    self._flush(batch)
+                    batch = []
+                    last_flush = now()
+
+            if batch:
+                self._flush(batch)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.writer.close()
+
+    def _flush(self, batch):
+        """Serialize and write one batch of records."""
+        start_time = now()
+        rows = [serialize_record(record) for record in batch]
+        serialize_time = now() - start_time
+
+        start_time = now()
+        self.writer.write(rows)
+        write_time = now() - start_time
+
+        self.serialize_time += serialize_time
+        self.write_time += write_time
+        self.written += len(rows)
+        metrics.histogram(
+            "export_serialize_seconds", "Detection export encoding time per batch"
+        ).record(serialize_time)
+        metrics.histogram(
+            "export_write_seconds", "Detection export write time per batch"
+        ).record(write_time)
+        metrics.counter("export_records_written", "Exported frames").inc(len(rows))
+
+    def close(self, timeout=5.0):
+        """Flush the remaining records and close the file."""
+        self.stop_event.set()
+        self.join(timeout=timeout)
+
+    def status(self):
+        """Short description of the exporter for the metrics panel."""
+        serialize_ms = 0.0
+        if self.written:
+            serialize_ms = self.serialize_time / self.written * 1000
+        error = f" • {self.error}" if self.error else ""
+        return (
+            f"Export: {self.written} frames → {os.path.basename(self.path)} • "
+            f"{serialize_ms:.2f} ms/frame to serialize • {self.dropped} dropped{error}"
+        )
+
+
+def create_exporter(perf_settings):
+    """Start an exporter for a new run if export is enabled, else return None."""
+    if not perf_settings["export_enabled"]:
+        return None
+
+    export_format = perf_settings["export_format"]
+    os.makedirs(perf_settings["export_dir"], exist_ok=True)
+    filename = f"detections_{datetime.now():%Y%m%d_%H%M%S}.{export_format}"
+    exporter = DetectionExporter(
+        os.path.join(perf_settings["export_dir"], filename), export_format
+    )
+    exporter.start()
+    return exporter
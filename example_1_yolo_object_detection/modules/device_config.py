@@ -1,6 +1,7 @@
 """Device configuration and platform detection."""
 
 import logging
+import os
 
 # Suppress Streamlit warnings
 logging.getLogger("streamlit.runtime.media_file_storage").setLevel(logging.CRITICAL)
@@ -16,18 +17,28 @@ except (FileNotFoundError, OSError, PermissionError):
     IS_RASPBERRY_PI = False
 
 # Camera configuration
+# Picamera2 "RGB888" is B, G, R in memory, so frames need no colour conversion
 CAMERA_CONFIG = {
-    "pi_camera": {"format": "BGR888", "size": (800, 600), "warmup_time": 2.0},
+    "pi_camera": {"format": "RGB888", "size": (800, 600), "warmup_time": 2.0},
     "webcam": {"source": 0, "width": 800, "height": 600},
+    "test_pattern": {"width": 800, "height": 600, "fps": 30},
+}
+
+# Shared model registry: models kept loaded across sessions and model switches.
+# Override the memory budget with the YOLO_MODEL_BUDGET_MB environment variable.
+MODEL_REGISTRY_CONFIG = {
+    "memory_budget_mb": float(
+        os.environ.get("YOLO_MODEL_BUDGET_MB", 300 if IS_RASPBERRY_PI else 1024)
+    ),
 }
 
 
 def get_source_options():
     """Get available video source options based on platform."""
     if IS_RASPBERRY_PI:
-        return ["picamera", "video"]
+        return ["picamera", "video", "test_pattern", "multi_stream", "replay"]
     else:
-        return ["webcam", "video"]
+        return ["webcam", "video", "test_pattern", "multi_stream", "replay"]
 
 
 def get_platform_info():
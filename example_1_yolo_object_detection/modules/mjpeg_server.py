@@ -0,0 +1,316 @@
+"""Built-in MJPEG (multipart HTTP) server for the live view."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+BOUNDARY = "frame"
+
+# Streams nobody has published to or watched for this long are closed
+STREAM_IDLE_TIMEOUT = 60.0
+# How often idle streams are looked for, in seconds
+REAP_INTERVAL = 10.0
+
+# Only this device can connect unless LAN viewers are allowed
+LOCAL_HOST = "127.0.0.1"
+LAN_HOST = "0.0.0.0"
+
+
+class FrameBroadcaster:
+    """
+    Encode the latest published frame to JPEG once, on a worker thread.
+
+    `publish()` only copies the frame into a preallocated buffer, so the
+    inference loop never waits on encoding. Every viewer receives the same
+    encoded bytes, however many are connected. Frames published faster than
+    they can be encoded are dropped in favour of the newest one.
+    """
+
+    def __init__(self, quality=80):
+        self.quality = quality
+        self.condition = threading.Condition()
+        self.staging = None
+        self.working = None
+        self.published_seq = 0
+        self.jpeg = None
+        self.jpeg_seq = 0
+        self.viewers = 0
+        self.last_publish = now()
+
+        self.frames_encoded = 0
+        self.encode_time = 0.0
+
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.thread.start()
+
+    def publish(self, frame):
+        """Hand a BGR frame to the encoder (copied, so the caller may reuse it)."""
+        with self.condition:
+            if self.staging is None or self.staging.shape != frame.shape:
+                self.staging = np.empty_like(frame)
+                self.working = np.empty_like(frame)
+            np.copyto(self.staging, frame)
+            self.published_seq += 1
+            self.last_publish = now()
+            self.condition.notify_all()
+
+    def _encode_loop(self):
+        """Encode newly published frames until stopped."""
+        encoded_seq = 0
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+
+        while not self.stop_event.is_set():
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: (
+                        self.published_seq != encoded_seq or self.stop_event.is_set()
+                    ),
+                    timeout=1.0,
+                )
+                if self.published_seq == encoded_seq:
+                    continue
+                # Swap buffers so publish() can write while we encode
+                self.staging, self.working = self.working, self.staging
+                frame = self.working
+                encoded_seq = self.published_seq
+
+            start_time = now()
+            success, jpeg = cv2.imencode(".jpg", frame, params)
+            elapsed = now() - start_time
+            metrics.histogram(
+                "mjpeg_encode_seconds", "JPEG encode time per frame"
+            ).record(elapsed)
+
+            if success:
+                with self.condition:
+                    self.jpeg = jpeg.tobytes()
+                    self.jpeg_seq = encoded_seq
+                    self.frames_encoded += 1
+                    self.encode_time += elapsed
+                    self.condition.notify_all()
+
+    def wait_for_jpeg(self, last_seq, timeout=5.0):
+        """
+        Block until a frame newer than `last_seq` is encoded.
+
+        Returns:
+            tuple: (seq, jpeg_bytes), or (last_seq, None) on timeout
+        """
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: self.jpeg_seq > last_seq or self.stop_event.is_set(),
+                timeout=timeout,
+            )
+            if not ready or self.jpeg is None:
+                return last_seq, None
+            return self.jpeg_seq, self.jpeg
+
+    def status(self):
+        """Short description of the stream for the metrics panel."""
+        avg_encode_ms = (
+            self.encode_time / self.frames_encoded * 1000 if self.frames_encoded else 0
+        )
+        return (
+            f"MJPEG stream: {self.viewers} viewer(s) • "
+            f"encode {avg_encode_ms:.1f} ms/frame"
+        )
+
+    def stop(self):
+        """Stop the encoder thread and release waiting viewers."""
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+
+
+def _parse_path(path):
+    """
+    Split a request path into its kind and stream name.
+
+    Only "/stream/<name>.mjpg" and "/snapshot/<name>.jpg" are served, so a
+    viewer has to know the name of the session it wants to watch.
+
+    Returns:
+        tuple: (kind, name), or (None, None) for an unknown path
+    """
+    path = path.split("?")[0]
+    for kind, extension in (("stream", ".mjpg"), ("snapshot", ".jpg")):
+        prefix = f"/{kind}/"
+        if path.startswith(prefix) and path.endswith(extension):
+            name = path[len(prefix) : -len(extension)]
+            if name and "/" not in name:
+                return kind, name
+    return None, None
+
+
+def _make_handler(server):
+    """Build a request handler class bound to an MjpegServer."""
+
+    class MjpegHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            kind, name = _parse_path(self.path)
+            broadcaster = server.get_stream(name) if name else None
+            if broadcaster is None:
+                self.send_error(404)
+            elif kind == "stream":
+                self._stream(broadcaster)
+            else:
+                self._snapshot(broadcaster)
+
+        def _snapshot(self, broadcaster):
+            _, jpeg = broadcaster.wait_for_jpeg(0)
+            if jpeg is None:
+                self.send_error(503, "No frame available yet")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(jpeg)
+
+        def _stream(self, broadcaster):
+            self.send_response(200)
+            self.send_header(
+                "Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+            )
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            with broadcaster.condition:
+                broadcaster.viewers += 1
+            seq = 0
+            try:
+                while not broadcaster.stop_event.is_set():
+                    seq, jpeg = broadcaster.wait_for_jpeg(seq)
+                    if jpeg is None:
+                        continue
+                    self.wfile.write(
+                        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(jpeg)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Viewer disconnected
+            finally:
+                with broadcaster.condition:
+                    broadcaster.viewers -= 1
+
+        def log_message(self, format, *args):
+            pass  # Keep the Streamlit console quiet
+
+    return MjpegHandler
+
+
+class MjpegServer:
+    """
+    HTTP server with one FrameBroadcaster per named stream.
+
+    Each browser session publishes to its own stream, so viewers only see
+    the frames of the session they opened. The server listens on localhost
+    unless `host` is LAN_HOST, and has no authentication either way. A
+    reaper thread closes the streams of sessions that have gone away.
+    """
+
+    def __init__(self, port, quality=80, host=LOCAL_HOST):
+        self.port = port
+        self.quality = quality
+        self.streams = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self._listen(host)
+        self.reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self.reaper.start()
+
+    def _listen(self, host):
+        """Bind the HTTP server to `host` and serve it on a new thread."""
+        self.host = host
+        self.httpd = ThreadingHTTPServer((host, self.port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def set_host(self, host):
+        """
+        Listen on `host` instead, keeping every open stream.
+
+        Raises:
+            OSError: If the port cannot be bound on the new host
+        """
+        if host == self.host:
+            return
+        old_host = self.host
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        try:
+            self._listen(host)
+        except OSError:
+            self._listen(old_host)
+            raise
+
+    def _reap_loop(self):
+        """Close idle streams every `REAP_INTERVAL` seconds until stopped."""
+        while not self.stop_event.wait(REAP_INTERVAL):
+            self.close_idle_streams()
+
+    def close_idle_streams(self):
+        """Close streams with no viewers that nothing was published to lately."""
+        with self.lock:
+            for name, broadcaster in list(self.streams.items()):
+                idle = now() - broadcaster.last_publish > STREAM_IDLE_TIMEOUT
+                if idle and broadcaster.viewers == 0:
+                    broadcaster.stop()
+                    del self.streams[name]
+
+    def open_stream(self, name):
+        """Return the broadcaster of stream `name`, creating it if needed."""
+        with self.lock:
+            if name not in self.streams:
+                self.streams[name] = FrameBroadcaster(self.quality)
+            broadcaster = self.streams[name]
+            broadcaster.last_publish = now()  # Not idle while the session starts
+            return broadcaster
+
+    def get_stream(self, name):
+        """Broadcaster of stream `name`, or None."""
+        with self.lock:
+            return self.streams.get(name)
+
+    def stop(self):
+        """Shut down the HTTP server and every encoder."""
+        self.stop_event.set()
+        with self.lock:
+            for broadcaster in self.streams.values():
+                broadcaster.stop()
+            self.streams.clear()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def get_mjpeg_server(port, quality=80, allow_lan=False):
+    """
+    Return the process-wide MJPEG server for `port`, starting it if needed.
+
+    With `allow_lan` the server accepts connections from other devices;
+    otherwise only from this one. The setting applies to every session
+    using the port.
+
+    Raises:
+        OSError: If the port cannot be bound, e.g. because it is in use
+    """
+    host = LAN_HOST if allow_lan else LOCAL_HOST
+    with _servers_lock:
+        if port not in _servers:
+            _servers[port] = MjpegServer(port, quality, host)
+        else:
+            _servers[port].set_host(host)
+        return _servers[port]
@@ -0,0 +1,193 @@
+"""Process-wide registry of loaded YOLO models shared by all sessions."""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+from ultralytics import YOLO
+from modules.cpu_config import record_pool_threads
+from modules.device_config import MODEL_REGISTRY_CONFIG
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+
+class SharedModel:
+    """
+    Thread-safe proxy around a YOLO model used by several sessions.
+
+    Ultralytics predictors are not safe to call from two threads at once,
+    so calls are serialized. Everything else is forwarded to the model.
+    Every `ModelRegistry.get()` returns its own proxy, and the registry
+    treats the model as in use while any of them is alive.
+    """
+
+    def __init__(self, model, model_path, lock, imgsz):
+        self._model = model
+        self._lock = lock
+        self.model_path = model_path
+        self.default_imgsz = imgsz
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self._model(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def default_imgsz(model):
+    """
+    Input size a model was trained or exported at.
+
+    Ultralytics keeps the last `imgsz` passed to an exported (ONNX) model
+    for later calls, so callers pass this explicitly instead of leaving
+    `imgsz` out.
+    """
+    if isinstance(model, SharedModel):
+        return model.default_imgsz
+    imgsz = model.overrides.get("imgsz")
+    if imgsz is None and model.predictor is not None:
+        # Exported models only expose it in their metadata, once loaded
+        imgsz = getattr(model.predictor.model, "imgsz", None)
+    return imgsz or 640
+
+
+def estimate_model_size_mb(model, model_path):
+    """Estimate the resident size of a model from its weights."""
+    try:
+        n_bytes = sum(
+            t.numel() * t.element_size()
+            for t in list(model.model.parameters()) + list(model.model.buffers())
+        )
+    except AttributeError:
+        # Exported formats (ONNX, NCNN, ...) have no torch module
+        n_bytes = os.path.getsize(model_path) if os.path.isfile(model_path) else 0
+    return n_bytes / (1024 * 1024)
+
+
+class ModelRegistry:
+    """
+    Keep several models loaded under a memory budget, evicting the least
+    recently used one when a new model would not fit.
+
+    Models still held by a session are never evicted, since dropping them
+    would only lead to a second copy being loaded. If every resident model
+    is in use, the new one is loaded over the budget.
+
+    Every model gets one warm-up inference when it is loaded, so the first
+    real frame after switching models does not pay for lazy initialization.
+    """
+
+    def __init__(self, memory_budget_mb, warmup_shape=(480, 640, 3)):
+        self.memory_budget_mb = memory_budget_mb
+        self.warmup_shape = warmup_shape
+        self.lock = threading.Lock()
+        self.load_locks = {}
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_load_time = 0.0
+
+    def __contains__(self, model_path):
+        with self.lock:
+            return model_path in self.entries
+
+    def resident_mb(self):
+        """Total estimated size of the resident models."""
+        return sum(entry["size_mb"] for entry in self.entries.values())
+
+    def get(self, model_path):
+        """Return a shared model for `model_path`, loading it on a miss."""
+        with self.lock:
+            if model_path in self.entries:
+                self.entries.move_to_end(model_path)
+                self.hits += 1
+                return self._share(model_path)
+            load_lock = self.load_locks.setdefault(model_path, threading.Lock())
+
+        # Load outside the registry lock so other models stay available, but
+        # only once per path even if several sessions ask at the same time
+        with load_lock:
+            with self.lock:
+                if model_path in self.entries:
+                    self.entries.move_to_end(model_path)
+                    self.hits += 1
+                    return self._share(model_path)
+
+            model, size_mb, load_time = self._load(model_path)
+
+            with self.lock:
+                self.misses += 1
+                self.last_load_time = load_time
+                self._evict(size_mb)
+                self.entries[model_path] = {
+                    "model": model,
+                    "lock": threading.Lock(),
+                    "imgsz": default_imgsz(model),
+                    "users": weakref.WeakSet(),
+                    "size_mb": size_mb,
+                    "load_time": load_time,
+                }
+                return self._share(model_path)
+
+    def _share(self, model_path):
+        """A new proxy for a resident model, counted as a user until collected."""
+        entry = self.entries[model_path]
+        shared = SharedModel(entry["model"], model_path, entry["lock"], entry["imgsz"])
+        entry["users"].add(shared)
+        return shared
+
+    def _load(self, model_path):
+        """Load and warm up a model; returns (model, size_mb, load_time)."""
+        start_time = now()
+        with record_pool_threads():
+            model = YOLO(model_path)
+            model(np.zeros(self.warmup_shape, dtype=np.uint8), verbose=False)
+        load_time = now() - start_time
+        metrics.histogram(
+            "yolo_model_load_seconds", "Model load and warm-up time"
+        ).record(load_time)
+
+        return model, estimate_model_size_mb(model, model_path), load_time
+
+    def _evict(self, needed_mb):
+        """Drop least recently used, unused models until `needed_mb` fits."""
+        for model_path in list(self.entries):
+            if self.resident_mb() + needed_mb <= self.memory_budget_mb:
+                break
+            if len(self.entries[model_path]["users"]) > 0:
+                continue  # Still held by a session
+            del self.entries[model_path]
+            self.evictions += 1
+
+    def stats(self):
+        """Snapshot of the registry counters."""
+        with self.lock:
+            return {
+                "resident": list(self.entries),
+                "in_use": [p for p, e in self.entries.items() if len(e["users"]) > 0],
+                "resident_mb": self.resident_mb(),
+                "budget_mb": self.memory_budget_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "last_load_time": self.last_load_time,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Return the process-wide model registry, creating it on first use."""
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(MODEL_REGISTRY_CONFIG["memory_budget_mb"])
+        return _registry
@@ -0,0 +1,200 @@
+"""Motion-gated inference with lightweight box tracking between keyframes."""
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Keypoints
+from edge_ai_common.instrumentation import now
+
+
+def _shift_results(results, offsets):
+    """Return a copy of `results` with each object moved by its (dx, dy) offset."""
+    if results.boxes is None or len(results.boxes) == 0:
+        return results
+
+    shifted = results.new()
+    delta = torch.as_tensor(
+        offsets, dtype=results.boxes.data.dtype, device=results.boxes.data.device
+    )
+
+    boxes = results.boxes.data.clone()
+    boxes[:, [0, 2]] += delta[:, 0:1]
+    boxes[:, [1, 3]] += delta[:, 1:2]
+    shifted.update(boxes=boxes)
+
+    if results.masks is not None:
+        # Masks live at the model input resolution, so scale the offset down
+        masks = results.masks.data
+        orig_h, orig_w = results.orig_shape
+        gain = min(masks.shape[1] / orig_h, masks.shape[2] / orig_w)
+        rolled = torch.stack(
+            [
+                torch.roll(
+                    mask,
+                    shifts=(int(round(dy * gain)), int(round(dx * gain))),
+                    dims=(0, 1),
+                )
+                for mask, (dx, dy) in zip(masks, offsets)
+            ]
+        )
+        shifted.update(masks=rolled)
+
+    if results.keypoints is not None:
+        kpts = results.keypoints.data.clone()
+        # Leave hidden keypoints where they are so they stay hidden
+        visible = torch.ones_like(kpts[..., 0])
+        if kpts.shape[-1] == 3:
+            visible = (kpts[..., 2] >= 0.5).to(kpts.dtype)
+        kpts[..., 0] += delta[:, None, 0] * visible
+        kpts[..., 1] += delta[:, None, 1] * visible
+        shifted.keypoints = Keypoints(kpts, results.orig_shape)
+
+    return shifted
+
+
+class BoxTracker:
+    """Carry detections forward with sparse optical flow on a downscaled frame."""
+
+    def __init__(self, width=320, max_corners=200):
+        self.width = width
+        self.max_corners = max_corners
+        self.scale = 1.0
+        self.prev_gray = None
+        self.results = None
+
+    def _prepare(self, frame):
+        """Downscale and convert a BGR frame to grayscale."""
+        self.scale = min(1.0, self.width / frame.shape[1])
+        if self.scale < 1.0:
+            frame = cv2.resize(
+                frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA
+            )
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def reset(self, frame, results):
+        """Start tracking from fresh keyframe detections."""
+        self.prev_gray = self._prepare(frame)
+        self.results = results
+
+    def track(self, frame):
+        """Move the tracked boxes to `frame` and return the updated results."""
+        gray = self._prepare(frame)
+        results = self.results
+
+        if results is None or results.boxes is None or len(results.boxes) == 0:
+            self.prev_gray = gray
+            return results
+
+        points = cv2.goodFeaturesToTrack(
+            self.prev_gray, self.max_corners, qualityLevel=0.01, minDistance=5
+        )
+        offsets = np.zeros((len(results.boxes), 2), dtype=np.float32)
+
+        if points is not None:
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                self.prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2
+            )
+            good = status.ravel() == 1
+            start = points.reshape(-1, 2)[good]
+            motion = (next_points.reshape(-1, 2) - points.reshape(-1, 2))[good]
+
+            # Median flow of the feature points inside each box
+            boxes = results.boxes.xyxy.cpu().numpy() * self.scale
+            for i, (x1, y1, x2, y2) in enumerate(boxes):
+                inside = (
+                    (start[:, 0] >= x1)
+                    & (start[:, 0] <= x2)
+                    & (start[:, 1] >= y1)
+                    & (start[:, 1] <= y2)
+                )
+                if inside.any():
+                    offsets[i] = np.median(motion[inside], axis=0) / self.scale
+
+        self.results = _shift_results(results, offsets)
+        self.prev_gray = gray
+        return self.results
+
+
+class MotionGate:
+    """
+    Skip YOLO on frames that barely changed since the last keyframe.
+
+    Motion is the mean absolute difference between small grayscale copies
+    of the current frame and the last keyframe. A keyframe is also forced
+    every `keyframe_interval` frames so slow changes are not missed.
+    """
+
+    def __init__(self, threshold=4.0, keyframe_interval=30, size=(160, 120)):
+        self.threshold = threshold
+        self.keyframe_interval = keyframe_interval
+        self.size = size
+        self.tracker = BoxTracker()
+        self.reference = None
+        self.frames_since_keyframe = 0
+
+        self.keyframes = 0
+        self.skipped = 0
+        self.keyframe_time = 0.0
+        self.tracking_time = 0.0
+
+    def _small_gray(self, frame):
+        """Downscaled, blurred grayscale copy used for frame differencing."""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_score(self, frame):
+        """Mean absolute pixel change (0-255) against the last keyframe."""
+        if self.reference is None:
+            return float("inf")
+        return float(cv2.absdiff(self._small_gray(frame), self.reference).mean())
+
+    def should_infer(self, frame):
+        """Return True if this frame needs a full YOLO pass."""
+        if self.reference is None:
+            return True
+        if self.frames_since_keyframe + 1 >= self.keyframe_interval:
+            return True
+        return self.motion_score(frame) > self.threshold
+
+    def keyframe(self, frame, results, inference_time):
+        """Record a frame that went through YOLO."""
+        self.reference = self._small_gray(frame)
+        self.tracker.reset(frame, results)
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        self.keyframe_time += inference_time
+
+    def carry(self, frame):
+        """Carry the last detections onto a frame that skipped YOLO."""
+        start_time = now()
+        results = self.tracker.track(frame)
+        self.tracking_time += now() - start_time
+        self.frames_since_keyframe += 1
+        self.skipped += 1
+        return results
+
+    def stats(self):
+        """
+        Skip rate and estimated compute saved.
+
+        Returns:
+            tuple: (skip_rate, saved_fraction)
+        """
+        total = self.keyframes + self.skipped
+        if total == 0 or self.keyframes == 0:
+            return 0.0, 0.0
+
+        avg_inference_time = self.keyframe_time / self.keyframes
+        full_cost = total * avg_inference_time
+        actual_cost = self.keyframe_time + self.tracking_time
+        saved_fraction = 1.0 - actual_cost / full_cost if full_cost > 0 else 0.0
+        return self.skipped / total, saved_fraction
+
+    def status(self):
+        """Short description of the gate's effect for the metrics panel."""
+        skip_rate, saved_fraction = self.stats()
+        return (
+            f"Motion gate: {skip_rate * 100:.0f}% frames skipped • "
+            f"~{saved_fraction * 100:.0f}% inference compute saved"
+        )
@@ -0,0 +1,190 @@
+"""Several video sources sharing one YOLO model with cross-stream batching."""
+
+import os
+import threading
+import time
+from collections import deque
+from edge_ai_common.instrumentation import now
+from modules.device_config import CAMERA_CONFIG
+from modules.capture import PiCameraSource, OpenCVSource, FakeCameraSource
+from modules.model_registry import default_imgsz
+from modules.yolo_inference import annotate
+
+# How often the scheduler asks whether its session is still connected, in seconds
+SESSION_CHECK_INTERVAL = 1.0
+
+
+def create_stream_source(spec):
+    """
+    Create a capture source from one line of the stream list.
+
+    Accepts a camera index ("0"), "picamera", "test_pattern", a video file
+    path (played in a loop) or a stream URL such as rtsp://...
+    """
+    spec = spec.strip()
+    if spec == "picamera":
+        return PiCameraSource(CAMERA_CONFIG["pi_camera"])
+    if spec == "test_pattern":
+        settings = CAMERA_CONFIG["test_pattern"]
+        return FakeCameraSource(settings["width"], settings["height"], settings["fps"])
+    if spec.isdigit():
+        settings = CAMERA_CONFIG["webcam"]
+        return OpenCVSource(int(spec), settings["width"], settings["height"])
+    return OpenCVSource(spec, loop=os.path.isfile(spec))
+
+
+class StreamState:
+    """Per-stream bookkeeping for the scheduler."""
+
+    def __init__(self, name, source):
+        self.name = name
+        self.source = source
+        self.last_served = 0.0
+        self.served = 0
+        self.output = None
+        self.output_times = deque(maxlen=30)
+        self.latencies = deque(maxlen=30)
+
+    def has_new_frame(self):
+        """True if the source captured a frame we have not processed yet."""
+        buffer = self.source.buffer
+        return buffer is not None and buffer.seq > self.source.last_read_seq
+
+
+class MultiStreamScheduler(threading.Thread):
+    """
+    Gather the newest frame from every stream into batched model calls.
+
+    Streams with a new frame are served least-recently-served first, up to
+    `max_batch` per call, so a fast camera cannot starve a slow one. With no
+    model the frames are shown as captured.
+
+    The scheduler stops by itself once `keep_running()` returns False, so a
+    closed browser tab does not leave the cameras and model running.
+    """
+
+    def __init__(self, specs, model, confidence, max_batch=4, keep_running=None):
+        super().__init__(daemon=True, name="MultiStreamScheduler")
+        self.model = model
+        self.confidence = confidence
+        self.max_batch = max_batch
+        self.keep_running = keep_running
+        self.streams = [
+            StreamState(spec.strip(), create_stream_source(spec)) for spec in specs
+        ]
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.batches = 0
+        self.batch_sizes = deque(maxlen=30)
+        self.error = None
+
+    def run(self):
+        """Start every source and schedule batches until stopped."""
+        for stream in self.streams:
+            stream.source.start()
+
+        last_check = now()
+        try:
+            while not self.stop_event.is_set():
+                if (
+                    self.keep_running is not None
+                    and now() - last_check >= SESSION_CHECK_INTERVAL
+                ):
+                    last_check = now()
+                    if not self.keep_running():
+                        break
+
+                ready = [s for s in self.streams if s.has_new_frame()]
+                if not ready:
+                    time.sleep(0.002)
+                    continue
+
+                ready.sort(key=lambda s: s.last_served)
+                self._run_batch(ready[: self.max_batch])
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            for stream in self.streams:
+                stream.source.stop()
+            # Release the devices before a new scheduler opens them again
+            for stream in self.streams:
+                stream.source.join(timeout=3.0)
+
+    def _run_batch(self, batch):
+        """Run one batched inference over the newest frame of each stream."""
+        frames, infos = [], []
+        for stream in batch:
+            frame, info = stream.source.read(timeout=0)
+            if frame is not None:
+                frames.append(frame)
+                infos.append((stream, info))
+
+        if not frames:
+            return
+
+        if self.model is None:
+            # Buffer slots are reused by the next capture
+            outputs = [frame.copy() for frame in frames]
+        else:
+            results = self.model(
+                frames,
+                conf=self.confidence,
+                imgsz=default_imgsz(self.model),
+                verbose=False,
+            )
+            outputs = [annotate(result) for result in results]
+        done = now()
+
+        with self.lock:
+            self.batches += 1
+            self.batch_sizes.append(len(frames))
+            for (stream, info), output in zip(infos, outputs):
+                stream.output = output
+                stream.served += 1
+                stream.last_served = done
+                stream.output_times.append(done)
+                stream.latencies.append(done - info.timestamp)
+
+    def outputs(self):
+        """Latest annotated frame of each stream as (name, frame) pairs."""
+        with self.lock:
+            return [(s.name, s.output) for s in self.streams]
+
+    def stats(self):
+        """
+        Per-stream FPS, latency and share of inference slots.
+
+        Returns:
+            tuple: (rows, avg_batch_size)
+        """
+        with self.lock:
+            total_served = sum(s.served for s in self.streams) or 1
+            rows = []
+            for s in self.streams:
+                fps = 0.0
+                if len(s.output_times) >= 2:
+                    span = s.output_times[-1] - s.output_times[0]
+                    if span > 0:
+                        fps = (len(s.output_times) - 1) / span
+                latency = (
+                    sum(s.latencies) / len(s.latencies) * 1000 if s.latencies else 0
+                )
+                captured, dropped = s.source.stats()
+                rows.append(
+                    {
+                        "Stream": s.name,
+                        "FPS": round(fps, 1),
+                        "Latency (ms)": round(latency),
+                        "Share": f"{s.served / total_served * 100:.0f}%",
+                        "Dropped": f"{dropped}/{captured}",
+                        "Error": s.source.error or "",
+                    }
+                )
+            avg_batch = 0.0
+            if self.batch_sizes:
+                avg_batch = sum(self.batch_sizes) / len(self.batch_sizes)
+            return rows, avg_batch
+
+    def stop(self):
+        """Signal the scheduler and its sources to stop."""
+        self.stop_event.set()
@@ -0,0 +1,281 @@
+"""Record camera sessions to disk and replay them as a capture source."""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from queue import Full, Queue
+import cv2
+import numpy as np
+from edge_ai_common.instrumentation import get_registry, now
+from modules.capture import FrameSource
+
+metrics = get_registry()
+
+RECORDINGS_DIR = "recordings"
+
+# "jpeg" is about 10-20x smaller; "raw" costs no encoding or decoding
+RECORDING_FORMATS = ["jpeg", "raw"]
+
+# Raw frames back to back, readable with np.memmap without decoding
+FRAMES_FILE = "frames.raw"
+# JPEG frames back to back, located through the offsets file
+JPEG_FILE = "frames.mjpeg"
+# Byte offset of each JPEG frame, plus the end of the last one
+OFFSETS_FILE = "offsets.npy"
+# Capture time of each frame, in seconds from the first one
+INDEX_FILE = "index.npy"
+META_FILE = "meta.json"
+
+
+class FrameRecorder:
+    """
+    Append every captured frame and its capture timestamp to a recording.
+
+    `write()` is called from the capture thread right after a frame is
+    published, so recording sees every frame even when the pipeline drops
+    some. It only copies the frame into a bounded queue; a writer thread
+    scales, encodes and stores it, so a slow disk never slows capture down.
+    If the writer falls behind, frames are dropped (and counted) instead,
+    and the stored ones keep their true capture times.
+
+    JPEG frames cost a few milliseconds of writer CPU each but need a
+    fraction of the disk bandwidth of raw ones, which an SD card cannot
+    sustain at 720p and above. `scale` shrinks frames before either.
+    """
+
+    def __init__(
+        self, path, source, frame_format="jpeg", scale=1.0, quality=90, max_queue=32
+    ):
+        if frame_format not in RECORDING_FORMATS:
+            raise ValueError(f"Unknown recording format: {frame_format}")
+        os.makedirs(path)
+        self.path = path
+        self.source = source
+        self.frame_format = frame_format
+        self.scale = scale
+        self.quality = quality
+        filename = JPEG_FILE if frame_format == "jpeg" else FRAMES_FILE
+        self.frames_file = open(os.path.join(path, filename), "wb")
+        self.queue = Queue(maxsize=max_queue)
+        self.timestamps = []
+        self.offsets = []
+        self.bytes_written = 0
+        self.shape = None
+        self.stored_shape = None
+        self.dtype = None
+        self.dropped = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(
+            target=self._write_loop, daemon=True, name="FrameRecorder"
+        )
+        self.thread.start()
+
+    def write(self, frame, timestamp):
+        """Queue one frame; frames of a different size are skipped."""
+        with self.lock:
+            if self.closed:
+                return
+            if self.shape is None:
+                self.shape = frame.shape
+                self.dtype = frame.dtype
+            elif frame.shape != self.shape:
+                return
+        try:
+            self.queue.put_nowait((frame.copy(), timestamp))
+        except Full:
+            self.dropped += 1
+            metrics.counter(
+                "recording_frames_dropped", "Frames dropped by a full recording queue"
+            ).inc()
+
+    def _write_loop(self):
+        """Store queued frames until `close()` queues None."""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            frame, timestamp = item
+            try:
+                data = self._encode(frame)
+                self.frames_file.write(data)
+            except (OSError, cv2.error) as e:
+                self.error = str(e)  # Disk full; keep what was written
+                continue
+            self.offsets.append(self.bytes_written)
+            self.bytes_written += data.nbytes
+            self.timestamps.append(timestamp)
+
+    def _encode(self, frame):
+        """Scale a frame and turn it into the bytes stored for it."""
+        if self.scale != 1.0:
+            frame = cv2.resize(
+                frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA
+            )
+        self.stored_shape = frame.shape
+        if self.frame_format == "raw":
+            return np.ascontiguousarray(frame).data
+        success, encoded = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        )
+        if not success:
+            raise OSError("JPEG encoding failed")
+        return encoded.data
+
+    def close(self):
+        """Store the queued frames and finish the recording, or delete it if empty."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        self.frames_file.close()
+
+        if not self.timestamps:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+
+        timestamps = np.array(self.timestamps) - self.timestamps[0]
+        np.save(os.path.join(self.path, INDEX_FILE), timestamps)
+        if self.frame_format == "jpeg":
+            offsets = np.array(self.offsets + [self.bytes_written], dtype=np.int64)
+            np.save(os.path.join(self.path, OFFSETS_FILE), offsets)
+        duration = float(timestamps[-1])
+        meta = {
+            "source": self.source,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "format": self.frame_format,
+            "frames": len(timestamps),
+            "dropped": self.dropped,
+            "shape": list(self.stored_shape),
+            "dtype": str(self.dtype),
+            "bytes": self.bytes_written,
+            "duration": duration,
+            "fps": (len(timestamps) - 1) / duration if duration > 0 else 0.0,
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def status(self):
+        """Short description of the recording for the metrics panel."""
+        frames = len(self.timestamps)
+        size_mb = self.bytes_written / 1024**2
+        error = f" • {self.error}" if self.error else ""
+        return (
+            f"Recording: {frames} {self.frame_format} frames ({size_mb:.0f} MB), "
+            f"{self.dropped} dropped → {self.path}{error}"
+        )
+
+
+def create_recorder(source, frame_format="jpeg", scale=1.0, root=RECORDINGS_DIR):
+    """Start a new recording named after the source and the current time."""
+    name = f"{source}_{datetime.now():%Y%m%d_%H%M%S}"
+    return FrameRecorder(os.path.join(root, name), source, frame_format, scale)
+
+
+class JpegFrames:
+    """Frames of a JPEG recording, decoded one at a time when indexed."""
+
+    def __init__(self, path):
+        self.data = np.memmap(os.path.join(path, JPEG_FILE), dtype=np.uint8, mode="r")
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return cv2.imdecode(self.data[start:end], cv2.IMREAD_UNCHANGED)
+
+
+def load_recording(path):
+    """
+    Open a recording without reading the frames into memory.
+
+    Returns:
+        tuple: (frames indexable as (N, H, W, C), timestamps, meta)
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    timestamps = np.load(os.path.join(path, INDEX_FILE))
+    if meta.get("format", "raw") == "jpeg":
+        return JpegFrames(path), timestamps, meta
+
+    frames = np.memmap(
+        os.path.join(path, FRAMES_FILE),
+        dtype=meta["dtype"],
+        mode="r",
+        shape=(meta["frames"], *meta["shape"]),
+    )
+    return frames, timestamps, meta
+
+
+def list_recordings(root=RECORDINGS_DIR):
+    """Finished recordings in `root`, newest first."""
+    if not os.path.isdir(root):
+        return []
+    paths = [
+        os.path.join(root, name)
+        for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, META_FILE))
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+class ReplaySource(FrameSource):
+    """
+    Play a recording back through the normal capture path.
+
+    In real-time mode frames are published with their original timing, so
+    the pipeline sees the same arrival pattern as the live camera and drops
+    frames the same way. In fast mode each frame is published as soon as
+    the previous one has been read, so every frame is processed as fast as
+    the pipeline can go.
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        super().__init__(name=f"ReplaySource({os.path.basename(path)})")
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.frames = None
+        self.timestamps = None
+        self.index = 0
+        self.start_time = 0.0
+
+    def open(self):
+        self.frames, self.timestamps, _ = load_recording(self.path)
+        self.start_time = now()
+
+    def capture(self, out):
+        if self.index >= len(self.frames):
+            if not self.loop:
+                return None
+            self.index = 0
+            self.start_time = now()
+
+        if self.realtime:
+            delay = self.start_time + self.timestamps[self.index] - now()
+            if delay > 0:
+                time.sleep(delay)
+        elif self.buffer is not None:
+            while not self.buffer.wait_consumed(timeout=0.1):
+                if self.stop_event.is_set():
+                    return None
+
+        frame = self.frames[self.index]
+        self.index += 1
+        if out is None:
+            return np.array(frame)
+        np.copyto(out, frame)
+        return out
+
+    def close(self):
+        self.frames = None  # Unmaps the file
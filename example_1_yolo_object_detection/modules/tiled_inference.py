@@ -0,0 +1,221 @@
+"""Sliced inference over overlapping tiles or regions of interest."""
+
+import torch
+from ultralytics.engine.results import Results
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+TILE_SIZES = [256, 320, 416, 480, 640]
+
+
+def parse_rois(text):
+    """
+    Parse regions of interest written as "x1,y1,x2,y2; x1,y1,x2,y2".
+
+    Values up to 1.0 are fractions of the frame size, larger values are
+    pixels.
+
+    Returns:
+        list: (x1, y1, x2, y2) tuples, empty for the whole frame
+
+    Raises:
+        ValueError: If a region is malformed or empty
+    """
+    rois = []
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        values = [float(v) for v in part.split(",")]
+        if len(values) != 4:
+            raise ValueError(f'"{part.strip()}" needs four values: x1,y1,x2,y2')
+        x1, y1, x2, y2 = values
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError(f'"{part.strip()}" has no area')
+        rois.append((x1, y1, x2, y2))
+    return rois
+
+
+def roi_to_pixels(roi, frame_shape):
+    """Convert a region to clipped integer pixel coordinates."""
+    height, width = frame_shape[:2]
+    if max(roi) <= 1.0:
+        roi = (roi[0] * width, roi[1] * height, roi[2] * width, roi[3] * height)
+    x1, y1, x2, y2 = (int(round(v)) for v in roi)
+    return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+
+def _steps(start, end, tile, stride):
+    """Evenly spaced tile origins along one axis, at most `stride` apart."""
+    span = end - start - tile
+    if span <= 0:
+        return [start]
+    count = -(-span // stride) + 1
+    return [start + round(i * span / (count - 1)) for i in range(count)]
+
+
+def make_tiles(region, tile_size, overlap):
+    """Cover a pixel region with square tiles that overlap by `overlap` (0-1)."""
+    x1, y1, x2, y2 = region
+    stride = max(1, int(tile_size * (1 - overlap)))
+    return [
+        (x, y, min(x + tile_size, x2), min(y + tile_size, y2))
+        for y in _steps(y1, y2, tile_size, stride)
+        for x in _steps(x1, x2, tile_size, stride)
+    ]
+
+
+def merge_detections(boxes, threshold):
+    """
+    Cross-tile NMS: keep the best box of each group of overlapping boxes.
+
+    Overlap is measured as intersection over the smaller box, so an object
+    cut at a tile edge is merged into the full detection from the
+    neighbouring tile even though their IoU is low. Only boxes of the same
+    class suppress each other.
+
+    Returns:
+        torch.Tensor: Indices of the boxes to keep
+    """
+    order = boxes[:, 4].argsort(descending=True)
+    xyxy = boxes[order, :4]
+    classes = boxes[order, 5]
+
+    area = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    top_left = torch.max(xyxy[:, None, :2], xyxy[None, :, :2])
+    bottom_right = torch.min(xyxy[:, None, 2:], xyxy[None, :, 2:])
+    inter = (bottom_right - top_left).clamp(min=0).prod(dim=2)
+    smaller = torch.min(area[:, None], area[None, :])
+    suppress = (inter / (smaller + 1e-9) > threshold) & (
+        classes[:, None] == classes[None, :]
+    )
+
+    keep = []
+    removed = torch.zeros(len(order), dtype=torch.bool)
+    for i in range(len(order)):
+        if not removed[i]:
+            keep.append(i)
+            removed |= suppress[i]
+    return order[keep]
+
+
+class TiledPredictor:
+    """
+    Run a model on overlapping tiles of the frame as one batch.
+
+    Small objects stay large enough to detect at a low model input size,
+    and with regions of interest the rest of the frame is never processed.
+    Boxes and keypoints are merged back into full-frame coordinates;
+    segmentation masks are not merged, so only the boxes are kept.
+    """
+
+    def __init__(
+        self,
+        tile_size=320,
+        overlap=0.2,
+        rois=None,
+        full_frame=False,
+        merge_threshold=0.6,
+        max_batch=8,
+    ):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.rois = rois or []
+        self.full_frame = full_frame
+        self.merge_threshold = merge_threshold
+        self.max_batch = max_batch
+
+        self.frame_shape = None
+        self.tiles = []
+        self.last_raw = 0
+        self.last_merged = 0
+
+    def plan(self, frame_shape):
+        """Tiles for a frame shape, recomputed only when the shape changes."""
+        if frame_shape[:2] != self.frame_shape:
+            self.frame_shape = frame_shape[:2]
+            height, width = self.frame_shape
+            regions = [roi_to_pixels(roi, frame_shape) for roi in self.rois]
+            regions = [r for r in regions if r[2] > r[0] and r[3] > r[1]]
+            if not self.rois:
+                regions = [(0, 0, width, height)]
+
+            self.tiles = [
+                tile
+                for region in regions
+                for tile in make_tiles(region, self.tile_size, self.overlap)
+            ]
+            if self.full_frame:
+                self.tiles.append((0, 0, width, height))
+        return self.tiles
+
+    def predict(self, model, frame, confidence):
+        """
+        Run every tile through `model` and merge the detections.
+
+        Returns:
+            tuple: (results, inference_time)
+        """
+        tiles = self.plan(frame.shape)
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+
+        start_time = now()
+        tile_results = []
+        for i in range(0, len(crops), self.max_batch):
+            tile_results += model(
+                crops[i : i + self.max_batch],
+                conf=confidence,
+                imgsz=self.tile_size,
+                verbose=False,
+            )
+
+        boxes = []
+        keypoints = []
+        for (x1, y1, _, _), result in zip(tiles, tile_results):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
+            offset = torch.tensor([x1, y1], dtype=result.boxes.data.dtype)
+            data = result.boxes.data[:, :6].cpu().clone()
+            data[:, 0:4] += offset.repeat(2)
+            boxes.append(data)
+            if result.keypoints is not None:
+                kpts = result.keypoints.data.cpu().clone()
+                kpts[..., :2] += offset
+                keypoints.append(kpts)
+
+        merged_boxes = torch.cat(boxes) if boxes else torch.zeros((0, 6))
+        merged_keypoints = torch.cat(keypoints) if keypoints else None
+        self.last_raw = len(merged_boxes)
+        if len(merged_boxes):
+            keep = merge_detections(merged_boxes, self.merge_threshold)
+            merged_boxes = merged_boxes[keep]
+            if merged_keypoints is not None:
+                merged_keypoints = merged_keypoints[keep]
+        self.last_merged = len(merged_boxes)
+        inference_time = now() - start_time
+
+        metrics.histogram("yolo_inference_seconds", "YOLO model call latency").record(
+            inference_time
+        )
+        metrics.counter("yolo_inferences", "YOLO model calls").inc()
+        metrics.counter("yolo_tiles", "Tiles run by tiled inference").inc(len(tiles))
+
+        results = Results(
+            frame,
+            path="",
+            names=model.names,
+            boxes=merged_boxes,
+            keypoints=merged_keypoints,
+        )
+        return results, inference_time
+
+    def status(self):
+        """Short description of the tiling for the metrics panel."""
+        regions = f"{len(self.rois)} ROIs" if self.rois else "whole frame"
+        full = " + full frame" if self.full_frame else ""
+        tiles = len(self.tiles) - int(self.full_frame)
+        return (
+            f"Tiled: {tiles} tiles of {self.tile_size} px "
+            f"({self.overlap:.0%} overlap, {regions}{full}) • "
+            f"{self.last_raw} → {self.last_merged} boxes after merge"
+        )
@@ -1,8 +1,25 @@
 """Reusable Streamlit UI components."""
 
-import io
+import os
 import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from modules.device_config import get_source_options, get_platform_info
+from modules.detection_export import EXPORT_FORMATS
+from modules.video_cache import save_upload
+from modules.tiled_inference import TILE_SIZES, parse_rois
+from modules.recording import RECORDINGS_DIR, RECORDING_FORMATS, list_recordings
+from modules.cpu_config import (
+    AVAILABLE_CPUS,
+    CPU_PRESETS,
+    STAGES,
+    affinity_supported,
+    auto_plan,
+    default_plan,
+    describe_clusters,
+    parse_cli_args,
+    parse_cpu_list,
+)
 
 
 def setup_page_config():
@@ -125,14 +142,24 @@ def render_detectable_objects_banner(yolo_enabled, task):
                 )
 
 
+# Where quantize_model.py writes INT8 models
+QUANTIZED_MODEL_DIR = "models"
+
+
 def get_model_options(task):
-    """Get available models for a given task."""
+    """Get available models for a given task, plus any INT8 models built for it."""
     models = {
         "Detection": ["yolo11n.pt", "yolo11s.pt", "yolo11m.pt"],
         "Segmentation": ["yolo11n-seg.pt", "yolo11s-seg.pt", "yolo11m-seg.pt"],
         "Pose Estimation": ["yolo11n-pose.pt", "yolo11s-pose.pt", "yolo11m-pose.pt"],
     }
-    return models.get(task, models["Detection"])
+    options = models.get(task, models["Detection"])
+
+    quantized = [
+        os.path.join(QUANTIZED_MODEL_DIR, f"{os.path.splitext(m)[0]}_int8.onnx")
+        for m in options
+    ]
+    return options + [path for path in quantized if os.path.isfile(path)]
 
 
 def setup_sidebar():
@@ -197,6 +224,265 @@ def setup_sidebar():
     return source, confidence, selected_model, task, yolo_enabled
 
 
+def setup_performance_settings():
+    """Configure the performance tuning options in a collapsible sidebar section."""
+    with st.sidebar.expander("⚡ Performance"):
+        adaptive_enabled = st.checkbox(
+            "Adaptive FPS",
+            value=False,
+            help="Lower the model input size and skip frames at run time to hold a target FPS.",
+        )
+        target_fps = st.slider(
+            "Target FPS",
+            1,
+            30,
+            10,
+            disabled=not adaptive_enabled,
+            help="Frames per second the adaptive controller tries to maintain.",
+        )
+
+        motion_gating = st.checkbox(
+            "Motion gating",
+            value=False,
+            help="Skip YOLO when the scene has not changed and track the last detections instead.",
+        )
+        motion_threshold = st.slider(
+            "Motion threshold",
+            0.5,
+            20.0,
+            4.0,
+            0.5,
+            disabled=not motion_gating,
+            help="Mean pixel change (0-255) against the last keyframe that triggers a new YOLO pass.",
+        )
+        keyframe_interval = st.slider(
+            "Keyframe interval",
+            2,
+            120,
+            30,
+            disabled=not motion_gating,
+            help="Force a full YOLO pass at least every N frames.",
+        )
+
+        fast_annotation = st.checkbox(
+            "Fast annotation",
+            value=False,
+            help="Draw results with a lightweight in-place annotator instead of Ultralytics plot().",
+        )
+        show_labels = st.checkbox(
+            "Show labels", value=True, disabled=not fast_annotation
+        )
+        show_masks = st.checkbox("Show masks", value=True, disabled=not fast_annotation)
+
+        tiled_enabled = st.checkbox(
+            "Tiled inference",
+            value=False,
+            help="Cut the frame into overlapping tiles (or only the regions of interest) and run them as one batch, for small objects in large frames.",
+        )
+        tile_size = st.selectbox(
+            "Tile size",
+            TILE_SIZES,
+            index=TILE_SIZES.index(320),
+            disabled=not tiled_enabled,
+            help="Tile edge in pixels, also used as the model input size.",
+        )
+        tile_overlap = st.slider(
+            "Tile overlap",
+            0.0,
+            0.5,
+            0.2,
+            0.05,
+            disabled=not tiled_enabled,
+            help="Share of each tile shared with its neighbours, so objects on a seam are seen whole.",
+        )
+        rois_text = st.text_input(
+            "Regions of interest",
+            value="",
+            disabled=not tiled_enabled,
+            help='"x1,y1,x2,y2" per region, separated by ";". Values up to 1 are fractions of the frame, larger ones pixels. Empty = whole frame. The rest of the frame is skipped.',
+        )
+        try:
+            tile_rois = parse_rois(rois_text)
+        except ValueError as e:
+            st.error(f"Regions of interest: {e}")
+            tile_rois = []
+        tile_full_frame = st.checkbox(
+            "Add full-frame pass",
+            value=False,
+            disabled=not tiled_enabled,
+            help="Also run the whole frame in the batch, for objects larger than a tile.",
+        )
+
+        cpu_settings = setup_cpu_settings()
+
+        mjpeg_enabled = st.checkbox(
+            "MJPEG stream output",
+            value=False,
+            help="Serve the live view from a built-in MJPEG server instead of re-sending every frame through Streamlit.",
+        )
+        mjpeg_port = st.number_input(
+            "Stream port",
+            min_value=1024,
+            max_value=65535,
+            value=8590,
+            disabled=not mjpeg_enabled,
+        )
+        mjpeg_lan = st.checkbox(
+            "Allow LAN viewers",
+            value=False,
+            disabled=not mjpeg_enabled,
+            help="Accept stream connections from other devices, needed when this page is opened from another machine. The stream has no authentication.",
+        )
+
+        export_enabled = st.checkbox(
+            "Export detections",
+            value=False,
+            help="Write boxes, classes, scores, masks (RLE) and keypoints for every frame on a background thread.",
+        )
+        export_format = st.selectbox(
+            "Export format",
+            EXPORT_FORMATS,
+            disabled=not export_enabled,
+            help="Parquet needs pyarrow (pip install pyarrow).",
+        )
+        export_dir = st.text_input(
+            "Export folder", value="exports", disabled=not export_enabled
+        )
+
+        record_enabled = st.checkbox(
+            "Record camera",
+            value=False,
+            help=f"Store every captured frame with its capture time in {RECORDINGS_DIR}/, to replay later with the 'replay' source.",
+        )
+        record_format = st.selectbox(
+            "Recording format",
+            RECORDING_FORMATS,
+            disabled=not record_enabled,
+            help="jpeg: about 0.1 MB per 800x600 frame, encoded on a background thread. raw: about 1.4 MB per frame (40 MB/s at 30 FPS), more than most SD cards can write.",
+        )
+        record_scale = st.select_slider(
+            "Recording scale",
+            options=[0.25, 0.5, 0.75, 1.0],
+            value=1.0,
+            disabled=not record_enabled,
+            help="Shrink frames before storing them; 0.5 needs a quarter of the disk space.",
+        )
+
+        metrics_enabled = st.checkbox(
+            "Metrics endpoint",
+            value=False,
+            help="Serve latency histograms and counters at /metrics (Prometheus) and /metrics.json.",
+        )
+        metrics_port = st.number_input(
+            "Metrics port",
+            min_value=1024,
+            max_value=65535,
+            value=9590,
+            disabled=not metrics_enabled,
+        )
+        dump_metrics = st.button(
+            "💾 Save metrics snapshot",
+            help="Write the current histograms and counters to metrics/metrics_<time>.json.",
+        )
+
+    return {
+        "adaptive_enabled": adaptive_enabled,
+        "target_fps": target_fps,
+        "motion_gating": motion_gating,
+        "motion_threshold": motion_threshold,
+        "keyframe_interval": keyframe_interval,
+        "fast_annotation": fast_annotation,
+        "show_labels": show_labels,
+        "show_masks": show_masks,
+        "tiled_enabled": tiled_enabled,
+        "tile_size": tile_size,
+        "tile_overlap": tile_overlap,
+        "tile_rois": tile_rois,
+        "tile_full_frame": tile_full_frame,
+        "cpu": cpu_settings,
+        "mjpeg_enabled": mjpeg_enabled,
+        "mjpeg_port": int(mjpeg_port),
+        "mjpeg_lan": mjpeg_lan,
+        "export_enabled": export_enabled,
+        "export_format": export_format,
+        "export_dir": export_dir,
+        "record_enabled": record_enabled,
+        "record_format": record_format,
+        "record_scale": record_scale,
+        "metrics_enabled": metrics_enabled,
+        "metrics_port": int(metrics_port),
+        "dump_metrics": dump_metrics,
+    }
+
+
+def setup_cpu_settings():
+    """
+    Inference thread count and per-stage CPU lists.
+
+    Defaults come from the command line (see `parse_cli_args`).
+
+    Returns:
+        dict: "threads" and a CPU list (None = not pinned) for each stage
+    """
+    cli_preset, cli_plan = parse_cli_args()
+    preset = st.selectbox(
+        "CPU layout",
+        CPU_PRESETS,
+        index=CPU_PRESETS.index(cli_preset),
+        help="Default leaves threads to the libraries. Auto gives inference the big "
+        "cores (or all cores but one) and moves capture and display off them.",
+    )
+    st.caption(describe_clusters())
+
+    if preset == "Default":
+        plan = default_plan()
+    elif preset == "Auto":
+        plan = auto_plan()
+    else:
+        plan = cli_plan
+    custom = preset == "Custom"
+
+    threads = st.number_input(
+        "Inference threads",
+        min_value=0,
+        max_value=len(AVAILABLE_CPUS),
+        value=min(plan["threads"], len(AVAILABLE_CPUS)),
+        disabled=not custom,
+        help="PyTorch and OpenCV threads. 0 = library default.",
+    )
+    cpu_settings = {"threads": int(threads)}
+
+    for stage in STAGES:
+        text = st.text_input(
+            f"{stage.capitalize()} CPUs",
+            value=plan[stage],
+            disabled=not custom or not affinity_supported(),
+            help='CPU list such as "1-3" or "0,2". Empty = not pinned.',
+        )
+        try:
+            cpu_settings[stage] = parse_cpu_list(text)
+        except ValueError as e:
+            st.error(f"{stage.capitalize()} CPUs: {e}")
+            cpu_settings[stage] = None
+
+    if not affinity_supported():
+        st.caption("CPU pinning is only available on Linux.")
+
+    return cpu_settings
+
+
+def render_model_registry_stats(stats):
+    """Show the shared model cache state in the sidebar."""
+    st.sidebar.caption(
+        f"🧠 Model cache: {len(stats['resident'])} loaded, "
+        f"{len(stats['in_use'])} in use "
+        f"({stats['resident_mb']:.0f}/{stats['budget_mb']:.0f} MB) • "
+        f"{stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['evictions']} evictions • "
+        f"last load {stats['last_load_time']:.1f} s"
+    )
+
+
 def render_yolo_toggle(source):
     """Render YOLO toggle checkbox on main page (centered)."""
     if source != "video":
@@ -211,29 +497,155 @@ def render_yolo_toggle(source):
         return False  # Video will be processed on demand
 
 
+def render_mjpeg_viewer(port, stream_name, height=620):
+    """Embed an MJPEG stream served on `port` of the host running the app."""
+    components.html(
+        f"""
+        <div style="text-align: center;">
+            <img id="live" style="max-width: 100%; max-height: {height - 20}px;">
+        </div>
+        <script>
+            var protocol = "http:";
+            var host = "localhost";
+            try {{
+                protocol = window.parent.location.protocol || protocol;
+                host = window.parent.location.hostname || host;
+            }} catch (e) {{}}
+            document.getElementById("live").src =
+                protocol + "//" + host + ":{port}/stream/{stream_name}.mjpg";
+        </script>
+        """,
+        height=height,
+    )
+
+
+def setup_multi_stream_settings():
+    """Configure the list of streams for multi-stream mode."""
+    specs = st.sidebar.text_area(
+        "Streams (one per line)",
+        value="test_pattern\ntest_pattern",
+        help="Camera index (0, 1, ...), picamera, test_pattern, a video file path or an rtsp:// URL.",
+    )
+    max_batch = st.sidebar.slider(
+        "Max batch size",
+        1,
+        8,
+        4,
+        help="Most frames sent to the model in one call.",
+    )
+    specs = [line.strip() for line in specs.splitlines() if line.strip()]
+    return specs, max_batch
+
+
+def setup_replay_settings():
+    """
+    Choose a recording and how to play it back.
+
+    Returns:
+        tuple: (recording_path, realtime, loop), or None if there are no recordings
+    """
+    recordings = list_recordings()
+    if not recordings:
+        return None
+
+    path = st.sidebar.selectbox("Recording", recordings, format_func=os.path.basename)
+    mode = st.sidebar.radio(
+        "Replay speed",
+        ["Real time", "As fast as possible"],
+        help="Real time keeps the original frame timing, so frames are dropped as they were live. As fast as possible hands over each frame as soon as the last one was read.",
+    )
+    loop = st.sidebar.checkbox("Loop", value=False)
+    return path, mode == "Real time", loop
+
+
+def display_multi_stream(outputs, result_frame, columns=2):
+    """Show the latest annotated frame of every stream in a grid."""
+    with result_frame.container():
+        for row_start in range(0, len(outputs), columns):
+            row = outputs[row_start : row_start + columns]
+            for col, (name, frame) in zip(st.columns(columns), row):
+                with col:
+                    if frame is None:
+                        st.info(f"⏳ Waiting for {name}...")
+                    else:
+                        st.image(frame, channels="BGR", caption=name, width="stretch")
+
+
+def display_multi_stream_metrics(rows, avg_batch, status_lines=None):
+    """Show per-stream FPS, latency and fairness."""
+    st.markdown(
+        "<h4 style='text-align: center;'>⚡ Per-Stream Metrics</h4>",
+        unsafe_allow_html=True,
+    )
+    st.table(rows)
+    st.caption(f"Average batch size: {avg_batch:.1f} frames per model call")
+    for line in status_lines or []:
+        st.caption(line)
+
+
 def upload_video():
-    """Handle video file upload with process button."""
+    """
+    Handle video file upload with process button.
+
+    The upload is streamed to a per-session temp file once, not on every rerun.
+
+    Returns:
+        tuple: (upload, process_clicked) where upload has "path" and "sha256"
+    """
     vid_file = st.sidebar.file_uploader(
         "Upload Video File", type=["mp4", "avi", "mov", "mkv"]
     )
 
     if vid_file is not None:
-        video_bytes = io.BytesIO(vid_file.read())
-        with open("temp_video.mp4", "wb") as out:
-            out.write(video_bytes.read())
+        ctx = get_script_run_ctx()
+        session_id = ctx.session_id if ctx is not None else "local"
+        upload = save_upload(vid_file, session_id, st.session_state.get("upload"))
+        st.session_state.upload = upload
 
         # Add button to process video
         process_video = st.sidebar.button(
             "▶️ Process Video with YOLO", use_container_width=True
         )
 
-        return "temp_video.mp4", process_video
+        return upload, process_video
 
     return None, False
 
 
+def display_video_summary(stats_placeholder, stats, cached=False):
+    """Show the summary of a processed video."""
+    heading = "⚡ **Loaded from cache**" if cached else "✅ **Processing Complete!**"
+    stats_placeholder.success(f"""
+    {heading}  
+    - Processed {stats["frames"]} frames  
+    - Average inference time: {stats["avg_inference_time"] * 1000:.1f} ms  
+    - Inference FPS: {stats["inference_fps"]:.1f}
+    """)
+
+
+def display_cached_video(video_path, result_frame):
+    """Play a cached annotated video, with a download button."""
+    with result_frame.container():
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.video(video_path)
+            with open(video_path, "rb") as f:
+                st.download_button(
+                    "⬇️ Download annotated video",
+                    f,
+                    file_name="annotated.mp4",
+                    mime="video/mp4",
+                )
+
+
 def display_metrics(
-    overall_fps, inference_fps, avg_inference_time, yolo_enabled, source, task
+    overall_fps,
+    inference_fps,
+    avg_inference_time,
+    yolo_enabled,
+    source,
+    task,
+    status_lines=None,
 ):
     """Display performance metrics with detectable objects banner above."""
     # Show detectable objects banner above metrics
@@ -287,3 +699,7 @@ def display_metrics(
                     value="N/A",
                     help="Enable YOLO Detection to see inference time metrics.",
                 )
+
+        # Extra pipeline status (adaptive settings, etc.) below the metrics
+        for line in status_lines or []:
+            st.caption(line)
@@ -0,0 +1,229 @@
+"""Per-session video uploads and a cache of processed results."""
+
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import cv2
+
+# One upload folder per server process, removed when the process exits
+UPLOAD_ROOT = os.path.join(tempfile.gettempdir(), f"yolo11_uploads_{os.getpid()}")
+RESULT_CACHE_DIR = "video_cache"
+CHUNK_SIZE = 1024 * 1024
+
+# Browsers only play H.264 MP4; mp4v is the fallback when OpenCV lacks it
+VIDEO_CODECS = ["avc1", "mp4v"]
+
+
+def is_active_session(session_id):
+    """Whether a Streamlit session is still connected (True outside a server)."""
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return True
+        return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        return True
+
+
+def cleanup_inactive_sessions():
+    """Delete the upload folders of sessions that have ended."""
+    if not os.path.isdir(UPLOAD_ROOT):
+        return
+    for session_id in os.listdir(UPLOAD_ROOT):
+        if not is_active_session(session_id):
+            shutil.rmtree(os.path.join(UPLOAD_ROOT, session_id), ignore_errors=True)
+
+
+atexit.register(shutil.rmtree, UPLOAD_ROOT, ignore_errors=True)
+
+# How often the uploads of ended sessions are looked for, in seconds
+SWEEP_INTERVAL = 60.0
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop():
+    """Delete the uploads of ended sessions every `SWEEP_INTERVAL` seconds."""
+    while True:
+        time.sleep(SWEEP_INTERVAL)
+        cleanup_inactive_sessions()
+
+
+def start_upload_sweeper():
+    """Start the background sweep of ended sessions' uploads, once per process."""
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_loop, daemon=True, name="UploadSweeper"
+            )
+            _sweeper.start()
+
+
+def save_upload(uploaded_file, session_id, previous=None):
+    """
+    Stream an uploaded file to the session's upload folder in chunks.
+
+    The SHA-256 of the content is computed while writing. If `previous`
+    (the result of the last call) is for the same upload and its file
+    still exists, nothing is written again.
+
+    Returns:
+        dict: "file_id", "path" and "sha256" of the saved upload
+    """
+    if (
+        previous is not None
+        and previous["file_id"] == uploaded_file.file_id
+        and os.path.exists(previous["path"])
+    ):
+        return previous
+
+    cleanup_inactive_sessions()
+    start_upload_sweeper()
+    session_dir = os.path.join(UPLOAD_ROOT, session_id)
+    os.makedirs(session_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    partial_path = os.path.join(session_dir, "upload.part")
+    uploaded_file.seek(0)
+    with open(partial_path, "wb") as out:
+        for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(chunk)
+
+    # Only the newest upload of a session is kept
+    if previous is not None and os.path.exists(previous["path"]):
+        os.remove(previous["path"])
+
+    extension = os.path.splitext(uploaded_file.name)[1].lower() or ".mp4"
+    sha256 = digest.hexdigest()
+    path = os.path.join(session_dir, f"{sha256[:16]}{extension}")
+    os.replace(partial_path, path)
+    return {"file_id": uploaded_file.file_id, "path": path, "sha256": sha256}
+
+
+def result_key(video_hash, model_path, confidence, task):
+    """Cache key of one processed result."""
+    settings = json.dumps([video_hash, model_path, round(confidence, 4), task])
+    return hashlib.sha256(settings.encode()).hexdigest()[:24]
+
+
+class CachedResultWriter:
+    """Write an annotated video into a temporary cache entry, then publish it."""
+
+    def __init__(self, cache, key, fps, frame_size):
+        self.cache = cache
+        self.key = key
+        self.partial_dir = os.path.join(cache.root, f"{key}.{uuid.uuid4().hex}.part")
+        os.makedirs(self.partial_dir)
+        self.video_path = os.path.join(self.partial_dir, "annotated.mp4")
+
+        self.video = None
+        for codec in VIDEO_CODECS:
+            fourcc = cv2.VideoWriter_fourcc(*codec)
+            video = cv2.VideoWriter(self.video_path, fourcc, fps or 30, frame_size)
+            if video.isOpened():
+                self.video = video
+                break
+        if self.video is None:
+            self.abort()
+            raise OSError("No MP4 encoder available in this OpenCV build")
+
+    def write(self, frame):
+        """Append one annotated BGR frame."""
+        self.video.write(frame)
+
+    def commit(self, stats):
+        """Finish the video and make the entry visible to `ResultCache.get`."""
+        self.video.release()
+        with open(os.path.join(self.partial_dir, "stats.json"), "w") as f:
+            json.dump(stats, f, indent=2)
+        self.cache._publish(self.key, self.partial_dir)
+
+    def abort(self):
+        """Discard an unfinished entry."""
+        if self.video is not None:
+            self.video.release()
+        shutil.rmtree(self.partial_dir, ignore_errors=True)
+
+
+class ResultCache:
+    """
+    Annotated videos and their stats on disk, keyed by `result_key`.
+
+    Entries are shared by every session. The least recently used ones are
+    removed once there are more than `max_entries`.
+    """
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_entries=20):
+        self.root = root
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        # Leftovers of runs that were stopped mid-way
+        for name in os.listdir(root):
+            if name.endswith(".part"):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    def get(self, key):
+        """
+        Look up a processed result.
+
+        Returns:
+            tuple: (video_path, stats), or None if it is not cached
+        """
+        entry = os.path.join(self.root, key)
+        stats_path = os.path.join(entry, "stats.json")
+        if not os.path.exists(stats_path):
+            return None
+        with open(stats_path) as f:
+            stats = json.load(f)
+        os.utime(entry)  # Mark as recently used
+        return os.path.join(entry, "annotated.mp4"), stats
+
+    def writer(self, key, fps, frame_size):
+        """Start a new entry for `key`."""
+        return CachedResultWriter(self, key, fps, frame_size)
+
+    def _publish(self, key, partial_dir):
+        """Move a finished entry into place and evict old ones."""
+        entry = os.path.join(self.root, key)
+        with self.lock:
+            if os.path.exists(entry):
+                shutil.rmtree(partial_dir, ignore_errors=True)  # Another session won
+            else:
+                os.replace(partial_dir, entry)
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries above `max_entries`."""
+        entries = [
+            os.path.join(self.root, name)
+            for name in os.listdir(self.root)
+            if not name.endswith(".part")
+        ]
+        entries.sort(key=os.path.getmtime)
+        for entry in entries[: max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide result cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -1,33 +1,52 @@
 """YOLO model loading and inference."""
 
-import time
-from ultralytics import YOLO
 import streamlit as st
+from edge_ai_common.instrumentation import get_registry, now
+from modules.model_registry import default_imgsz, get_model_registry
+
+metrics = get_registry()
 
 
 def load_model(model_path):
-    """Load YOLO model with caching."""
-    if (
-        "yolo_model" not in st.session_state
-        or st.session_state.get("current_model") != model_path
-    ):
-        with st.spinner(f"Loading model {model_path}..."):
-            st.session_state.yolo_model = YOLO(model_path)
-            st.session_state.current_model = model_path
+    """Get a YOLO model from the process-wide registry, loading it if needed."""
+    registry = get_model_registry()
+
+    if model_path in registry:
+        return registry.get(model_path)
 
-    return st.session_state.yolo_model
+    with st.spinner(f"Loading model {model_path}..."):
+        return registry.get(model_path)
 
 
-def run_inference(model, frame, confidence):
+def predict(model, frame, confidence, imgsz=None):
     """
-    Run YOLO inference on a frame.
+    Run YOLO on a frame without drawing anything.
 
     Returns:
-        tuple: (annotated_frame, inference_time)
+        tuple: (results, inference_time)
+    """
+    start_time = now()
+    results = model(
+        frame, conf=confidence, imgsz=imgsz or default_imgsz(model), verbose=False
+    )
+    inference_time = now() - start_time
+
+    metrics.histogram("yolo_inference_seconds", "YOLO model call latency").record(
+        inference_time
+    )
+    metrics.counter("yolo_inferences", "YOLO model calls").inc()
+
+    return results[0], inference_time
+
+
+def annotate(results, frame=None, annotator=None):
     """
-    start_time = time.time()
-    results = model(frame, conf=confidence, verbose=False)
-    inference_time = time.time() - start_time
-    annotated_frame = results[0].plot()
+    Draw results on their own image, or on `frame` to reuse old detections.
 
-    return annotated_frame, inference_time
+    Uses `annotator` (a FastAnnotator) when given, otherwise `results.plot()`.
+    """
+    if annotator is not None:
+        return annotator.draw(results, frame)
+    if frame is None:
+        return results.plot()
+    return results.plot(img=frame)
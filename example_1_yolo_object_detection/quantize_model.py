@@ -0,0 +1,418 @@
+"""Quantize a YOLO11 model to INT8 with ONNX Runtime and compare it to FP32."""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+
+from modules.ui_components import get_model_options, QUANTIZED_MODEL_DIR
+from edge_ai_common.instrumentation import Histogram, now
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Index of the Detect/Segment/Pose head in the YOLO11 model graph
+HEAD_PREFIX = "/model.23/"
+
+
+def list_images(folder, limit=None):
+    """Sorted image paths in `folder`, at most `limit` of them."""
+    paths = sorted(
+        p
+        for p in glob.glob(os.path.join(folder, "*"))
+        if p.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+def preprocess(image, imgsz):
+    """Letterbox a BGR image into the NCHW float tensor the ONNX model expects."""
+    image = LetterBox(new_shape=(imgsz, imgsz), auto=False)(image=image)
+    image = image[..., ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+    return np.ascontiguousarray(image, dtype=np.float32)[None] / 255.0
+
+
+class ImageFolderCalibrationReader:
+    """Feed calibration images to ONNX Runtime one at a time."""
+
+    def __init__(self, image_paths, input_name, imgsz):
+        self.image_paths = iter(image_paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+
+    def get_next(self):
+        for path in self.image_paths:
+            image = cv2.imread(path)
+            if image is not None:
+                return {self.input_name: preprocess(image, self.imgsz)}
+        return None
+
+    def rewind(self):
+        pass  # Single pass is enough for MinMax / Entropy calibration
+
+
+def head_nodes_to_exclude(onnx_model):
+    """
+    Nodes of the box/keypoint decoding in the head, kept in FP32.
+
+    The convolution branches of the head (cv2/cv3/cv4) are still quantized.
+    Quantizing the decode arithmetic costs a lot of box accuracy and saves
+    almost no time.
+    """
+    branches = tuple(f"{HEAD_PREFIX}{branch}." for branch in ("cv2", "cv3", "cv4"))
+    return [
+        node.name
+        for node in onnx_model.graph.node
+        if node.name.startswith(HEAD_PREFIX) and not node.name.startswith(branches)
+    ]
+
+
+def quantize(model_path, calib_dir, imgsz, calib_count, output_dir, exclude_head):
+    """
+    Export `model_path` to ONNX and quantize it to static INT8.
+
+    Returns:
+        tuple: (fp32_onnx_path, int8_onnx_path)
+    """
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    calib_images = list_images(calib_dir, calib_count)
+    if not calib_images:
+        raise FileNotFoundError(f"No calibration images found in {calib_dir}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    fp32_path = os.path.join(output_dir, f"{stem}.onnx")
+    prep_path = os.path.join(output_dir, f"{stem}_prep.onnx")
+    int8_path = os.path.join(output_dir, f"{stem}_int8.onnx")
+
+    print(f"Exporting {model_path} to ONNX...")
+    exported = YOLO(model_path).export(
+        format="onnx", imgsz=imgsz, dynamic=True, simplify=True
+    )
+    os.replace(exported, fp32_path)
+
+    quant_pre_process(fp32_path, prep_path)
+    fp32_model = onnx.load(fp32_path)
+    input_name = (
+        ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"])
+        .get_inputs()[0]
+        .name
+    )
+
+    print(f"Calibrating on {len(calib_images)} images from {calib_dir}...")
+    quantize_static(
+        prep_path,
+        int8_path,
+        ImageFolderCalibrationReader(calib_images, input_name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=head_nodes_to_exclude(fp32_model) if exclude_head else [],
+    )
+    os.remove(prep_path)
+
+    # Ultralytics reads class names, stride, task and imgsz from the metadata
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+
+    return fp32_path, int8_path
+
+
+def box_iou(a, b):
+    """Pairwise IoU between two (N, 4) and (M, 4) xyxy arrays."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedily match candidate boxes to reference boxes of the same class.
+
+    Returns:
+        tuple: (matches, ious_of_matches)
+    """
+    ref_boxes, ref_classes = reference
+    cand_boxes, cand_classes = candidate
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return 0, []
+
+    iou = box_iou(ref_boxes, cand_boxes)
+    iou[ref_classes[:, None] != cand_classes[None, :]] = 0
+    matched_ious = []
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < iou_threshold:
+            break
+        matched_ious.append(float(iou[i, j]))
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return len(matched_ious), matched_ious
+
+
+def evaluate(model_path, images, imgsz, confidence):
+    """
+    Run a model over `images` and time it.
+
+    Returns:
+        tuple: (detections, latencies_in_seconds, memory_mb)
+    """
+    rss_before = process_memory_mb()
+    model = YOLO(model_path)
+    model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    memory_mb = process_memory_mb() - rss_before
+
+    latencies = []
+    detections = []
+    for path in images:
+        image = cv2.imread(path)
+        start = now()
+        result = model(image, imgsz=imgsz, conf=confidence, verbose=False)[0]
+        latencies.append(now() - start)
+        detections.append(
+            (
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(int),
+            )
+        )
+    return detections, latencies, memory_mb
+
+
+def evaluate_in_subprocess(model_path, images, imgsz, confidence):
+    """
+    Run `evaluate` in a fresh process.
+
+    ONNX Runtime arenas and the allocator keep memory after a model is
+    dropped, so measuring both models in one process would charge the
+    second one for the first.
+
+    Returns:
+        tuple: (detections, latency_histogram, memory_mb)
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        detections, latencies, memory_mb = pool.submit(
+            evaluate, model_path, images, imgsz, confidence
+        ).result()
+
+    latency = Histogram()
+    for seconds in latencies:
+        latency.record(seconds)
+    return detections, latency, memory_mb
+
+
+def process_memory_mb():
+    """Resident memory of this process in MB (0 if psutil is missing)."""
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def build_report(fp32_path, int8_path, eval_images, imgsz, confidence):
+    """Compare FP32 and INT8 latency, memory and detection agreement."""
+    fp32_dets, fp32_latency, fp32_memory = evaluate_in_subprocess(
+        fp32_path, eval_images, imgsz, confidence
+    )
+    int8_dets, int8_latency, int8_memory = evaluate_in_subprocess(
+        int8_path, eval_images, imgsz, confidence
+    )
+
+    total_ref = sum(len(d[0]) for d in fp32_dets)
+    total_cand = sum(len(d[0]) for d in int8_dets)
+    total_matched = 0
+    all_ious = []
+    for reference, candidate in zip(fp32_dets, int8_dets):
+        matched, ious = match_detections(reference, candidate)
+        total_matched += matched
+        all_ious += ious
+
+    precision = total_matched / total_cand if total_cand else 1.0
+    recall = total_matched / total_ref if total_ref else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0
+
+    def summary(path, latency, memory_mb):
+        return {
+            "model": path,
+            "file_size_mb": os.path.getsize(path) / (1024 * 1024),
+            "memory_mb": memory_mb,
+            "latency_ms": {
+                "mean": latency.mean() * 1000,
+                "p50": latency.percentile(0.5) * 1000,
+                "p90": latency.percentile(0.9) * 1000,
+                "p99": latency.percentile(0.99) * 1000,
+            },
+        }
+
+    return {
+        "images": len(eval_images),
+        "imgsz": imgsz,
+        "confidence": confidence,
+        "fp32": summary(fp32_path, fp32_latency, fp32_memory),
+        "int8": summary(int8_path, int8_latency, int8_memory),
+        "agreement": {
+            "fp32_detections": total_ref,
+            "int8_detections": total_cand,
+            "matched": total_matched,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+            "mean_iou": float(np.mean(all_ious)) if all_ious else 0.0,
+        },
+    }
+
+
+def format_report(report):
+    """Human-readable Markdown version of the report."""
+    fp32, int8, agreement = report["fp32"], report["int8"], report["agreement"]
+    speedup = fp32["latency_ms"]["mean"] / max(int8["latency_ms"]["mean"], 1e-9)
+    rows = "\n".join(
+        f"| {label} | {fp32['latency_ms'][key]:.1f} | {int8['latency_ms'][key]:.1f} |"
+        for label, key in [
+            ("Mean latency (ms)", "mean"),
+            ("p50 latency (ms)", "p50"),
+            ("p90 latency (ms)", "p90"),
+            ("p99 latency (ms)", "p99"),
+        ]
+    )
+    return f"""# INT8 Quantization Report
+
+{report["images"]} held-out images at imgsz {report["imgsz"]}, confidence {report["confidence"]}.
+
+| Metric | FP32 | INT8 |
+|--------|------|------|
+{rows}
+| Model file (MB) | {fp32["file_size_mb"]:.1f} | {int8["file_size_mb"]:.1f} |
+| Memory to load, fresh process (MB) | {fp32["memory_mb"]:.0f} | {int8["memory_mb"]:.0f} |
+
+**Speed-up:** {speedup:.2f}x
+
+## Detection Agreement (INT8 vs FP32)
+
+Boxes match when they have the same class and IoU >= 0.5.
+
+- FP32 detections: {agreement["fp32_detections"]}
+- INT8 detections: {agreement["int8_detections"]}
+- Matched: {agreement["matched"]}
+- Precision: {agreement["precision"]:.3f}, Recall: {agreement["recall"]:.3f}, F1: {agreement["f1"]:.3f}
+- Mean IoU of matches: {agreement["mean_iou"]:.3f}
+"""
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Quantize a YOLO11 model to INT8 and compare it with FP32."
+    )
+    parser.add_argument(
+        "--task",
+        type=str,
+        default="Detection",
+        choices=["Detection", "Segmentation", "Pose Estimation"],
+        help="Task of the model to quantize",
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="Model size index: 0 = nano, 1 = small, 2 = medium",
+    )
+    parser.add_argument(
+        "--calib-dir",
+        type=str,
+        required=True,
+        help="Folder of representative images for calibration",
+    )
+    parser.add_argument(
+        "--eval-dir",
+        type=str,
+        default=None,
+        help="Folder of held-out images for the comparison report",
+    )
+    parser.add_argument(
+        "--calib-count", type=int, default=200, help="Calibration images to use"
+    )
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence")
+    parser.add_argument(
+        "--quantize-head",
+        action="store_true",
+        help="Also quantize the box decoding in the head (faster, less accurate)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=QUANTIZED_MODEL_DIR,
+        help="Where to write the ONNX models and report",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Quantize the model and write the comparison report"""
+    args = parse_arguments()
+
+    try:
+        model_path = get_model_options(args.task)[args.size]
+        fp32_path, int8_path = quantize(
+            model_path,
+            args.calib_dir,
+            args.imgsz,
+            args.calib_count,
+            args.output_dir,
+            exclude_head=not args.quantize_head,
+        )
+        print(f"INT8 model written to {int8_path}")
+
+        if args.eval_dir:
+            eval_images = list_images(args.eval_dir)
+            if not eval_images:
+                raise FileNotFoundError(f"No evaluation images in {args.eval_dir}")
+
+            report = build_report(
+                fp32_path, int8_path, eval_images, args.imgsz, args.conf
+            )
+            stem = os.path.splitext(os.path.basename(int8_path))[0]
+            report_base = os.path.join(args.output_dir, f"{stem}_report")
+            with open(f"{report_base}.json", "w") as f:
+                json.dump(report, f, indent=2)
+            markdown = format_report(report)
+            with open(f"{report_base}.md", "w") as f:
+                f.write(markdown)
+            print(markdown)
+            print(f"Report written to {report_base}.md and {report_base}.json")
+
+    except ImportError as e:
+        print(f"Error: {e}")
+        print("Install the quantization tools: pip install onnx onnxruntime")
+        exit(1)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
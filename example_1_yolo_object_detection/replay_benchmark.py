@@ -0,0 +1,211 @@
+"""Replay a recording through the live pipeline and report latency and drops."""
+
+import argparse
+import json
+import streamlit as st
+from streamlit.logger import set_log_level
+
+from YOLO11_Example import run_camera_stream
+from modules.camera_handler import cleanup_camera
+from modules.recording import ReplaySource, list_recordings, load_recording
+from modules.ui_components import get_model_options, setup_performance_settings
+from modules.yolo_inference import load_model
+from edge_ai_common.instrumentation import get_registry, now
+
+metrics = get_registry()
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def run_replay(recording, realtime, model, task, confidence, perf_settings):
+    """
+    Run one recording through `run_camera_stream` until it ends.
+
+    Returns:
+        dict: Frame counts, FPS and latency percentiles in milliseconds
+    """
+    camera = ReplaySource(recording, realtime=realtime)
+    camera.start()
+    if not camera.wait_ready(5.0):
+        cleanup_camera(camera)
+        raise RuntimeError(camera.error or f"Could not replay {recording}")
+
+    start_time = now()
+    try:
+        run_camera_stream(
+            camera,
+            model,
+            task,
+            model is not None,
+            confidence,
+            st.empty(),
+            st.empty(),
+            "replay",
+            perf_settings,
+        )
+    finally:
+        cleanup_camera(camera)
+    elapsed = now() - start_time
+
+    if camera.error:
+        raise RuntimeError(camera.error)
+
+    captured, dropped = camera.stats()
+    shown = metrics.counter("stream_frames").value
+
+    def quantiles_ms(name):
+        histogram = metrics.histograms.get(name)
+        if histogram is None or histogram.count == 0:
+            return None
+        values = {
+            f"p{round(q * 100)}": histogram.percentile(q) * 1000 for q in QUANTILES
+        }
+        values["max"] = histogram.max * 1000
+        return values
+
+    return {
+        "recording": recording,
+        "mode": "realtime" if realtime else "fast",
+        "task": task,
+        "frames_published": captured,
+        "frames_shown": shown,
+        "frames_dropped": dropped,
+        "fps": shown / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": quantiles_ms("stream_frame_latency_seconds"),
+        "process_ms": quantiles_ms("stream_process_seconds"),
+        "inference_ms": quantiles_ms("yolo_inference_seconds"),
+    }
+
+
+def print_results(result, meta):
+    """Print a summary of the run"""
+    print(
+        f"""
+Replay Benchmark
+Recording: {result["recording"]}
+Recorded: {meta["frames"]} {meta.get("format", "raw")} frames, {meta["shape"][1]}x{meta["shape"][0]}, {meta["fps"]:.1f} FPS ({meta.get("dropped", 0)} dropped while recording)
+Mode: {result["mode"]}, Task: {result["task"]}
+{"-" * 60}
+Frames published: {result["frames_published"]}
+Frames shown:     {result["frames_shown"]}
+Frames dropped:   {result["frames_dropped"]}
+Throughput:       {result["fps"]:.1f} FPS
+{"-" * 60}
+{"Stage (ms)":<26}{"p50":>8}{"p90":>8}{"p99":>8}{"max":>10}"""
+    )
+    for label, key in [
+        ("Capture → display", "latency_ms"),
+        ("Process (YOLO + draw)", "process_ms"),
+        ("Inference", "inference_ms"),
+    ]:
+        values = result[key]
+        if values is None:
+            continue
+        print(
+            f"{label:<26}{values['p50']:>8.1f}{values['p90']:>8.1f}"
+            f"{values['p99']:>8.1f}{values['max']:>10.1f}"
+        )
+    print("-" * 60)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Replay a camera recording through the app pipeline and "
+        "report capture-to-display latency and dropped frames. The app's CPU "
+        "options (--threads, --inference-cpus, ...) are accepted too."
+    )
+    parser.add_argument(
+        "--recording",
+        type=str,
+        default=None,
+        help="Recording folder (default: the newest one in recordings/)",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="realtime",
+        choices=["realtime", "fast"],
+        help="realtime keeps the original frame timing; fast processes every frame",
+    )
+    parser.add_argument(
+        "--task",
+        type=str,
+        default="Detection",
+        choices=["Detection", "Segmentation", "Pose Estimation"],
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="Model size index: 0 = nano, 1 = small, 2 = medium",
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence")
+    parser.add_argument(
+        "--no-yolo", action="store_true", help="Measure the pipeline without YOLO"
+    )
+    parser.add_argument("--fast-annotation", action="store_true")
+    parser.add_argument("--motion-gating", action="store_true")
+    parser.add_argument("--tiled", action="store_true")
+    parser.add_argument(
+        "--json", type=str, default=None, help="Also write the results to a file"
+    )
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def main():
+    """Replay the recording and print the latency report"""
+    args = parse_arguments()
+
+    # Streamlit warns about the missing UI on every call when run headless
+    set_log_level("error")
+
+    recording = args.recording
+    if recording is None:
+        recordings = list_recordings()
+        if not recordings:
+            print("Error: No recordings found. Record one with the app first.")
+            exit(1)
+        recording = recordings[0]
+
+    try:
+        _, _, meta = load_recording(recording)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not open recording {recording}: {e}")
+        exit(1)
+
+    # The app's own defaults, so the benchmark runs what the app runs
+    perf_settings = setup_performance_settings()
+    perf_settings["fast_annotation"] = args.fast_annotation
+    perf_settings["motion_gating"] = args.motion_gating
+    perf_settings["tiled_enabled"] = args.tiled
+
+    model = None
+    if not args.no_yolo:
+        model = load_model(get_model_options(args.task)[args.size])
+
+    try:
+        result = run_replay(
+            recording,
+            args.mode == "realtime",
+            model,
+            args.task,
+            args.conf,
+            perf_settings,
+        )
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    print_results(result, meta)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({**result, "recording_meta": meta}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Sweep inference thread counts and CPU layouts, reporting FPS and tail latency."""
+
+import argparse
+import json
+import threading
+
+from modules.cpu_config import (
+    AVAILABLE_CPUS,
+    STAGES,
+    apply_cpu_settings,
+    auto_plan,
+    default_plan,
+    describe_clusters,
+    inference_pool_threads,
+    parse_cpu_list,
+)
+from modules.model_registry import get_model_registry
+from modules.multi_stream import create_stream_source
+from modules.ui_components import get_model_options
+from modules.yolo_inference import predict, annotate
+from edge_ai_common.instrumentation import Histogram, now
+
+LAYOUTS = {"default": default_plan, "auto": auto_plan}
+
+
+def build_cpu_settings(layout, threads):
+    """CPU settings for one sweep point, in the form `apply_cpu_settings` takes."""
+    plan = LAYOUTS[layout]()
+    cpu_settings = {"threads": threads}
+    for stage in STAGES:
+        cpu_settings[stage] = parse_cpu_list(plan[stage])
+    return cpu_settings
+
+
+def run_point(model, source_spec, cpu_settings, confidence, warmup, duration):
+    """
+    Run capture, inference and annotation with one CPU configuration.
+
+    Returns:
+        dict: FPS, latency percentiles and dropped frames
+    """
+    source = create_stream_source(source_spec)
+    source.start()
+    try:
+        if not source.wait_ready(10.0):
+            raise RuntimeError(source.error or f"No frames from {source_spec}")
+
+        apply_cpu_settings(
+            cpu_settings,
+            {
+                "inference": [threading.get_native_id()] + inference_pool_threads(),
+                "capture": [source.native_id],
+            },
+        )
+
+        inference = Histogram()
+        latency = Histogram()
+        frames = 0
+        start_time = now()
+        measure_from = start_time + warmup
+        end_time = measure_from + duration
+        dropped_at_start = 0
+
+        while now() < end_time:
+            frame, info = source.read(timeout=2.0)
+            if frame is None:
+                raise RuntimeError(source.error or "Source stopped")
+
+            results, inference_time = predict(model, frame, confidence)
+            annotate(results)
+            done = now()
+
+            if done < measure_from:
+                dropped_at_start = info.dropped
+                continue
+            if frames == 0:
+                measure_from = done
+            frames += 1
+            inference.record(inference_time)
+            latency.record(done - info.timestamp)
+
+        elapsed = now() - measure_from
+        _, dropped = source.stats()
+    finally:
+        source.stop()
+        source.join(timeout=3.0)
+
+    return {
+        "frames": frames,
+        "fps": (frames - 1) / elapsed if frames > 1 and elapsed > 0 else 0.0,
+        "inference_ms": inference.percentile(0.5) * 1000,
+        "latency_ms": {
+            "p50": latency.percentile(0.5) * 1000,
+            "p95": latency.percentile(0.95) * 1000,
+            "p99": latency.percentile(0.99) * 1000,
+        },
+        "dropped": dropped - dropped_at_start,
+    }
+
+
+def print_results(rows, model_path, source_spec):
+    """Print a comparison table"""
+    print(
+        f"""
+Thread / Affinity Sweep
+Model: {model_path}, Source: {source_spec}
+{describe_clusters()}
+{"-" * 78}
+{"Layout":<10}{"Threads":>8}{"FPS":>8}{"Infer p50":>11}{"p50":>9}{"p95":>9}{"p99":>9}{"Dropped":>9}
+{"-" * 78}"""
+    )
+    for row in rows:
+        latency = row["latency_ms"]
+        threads = row["threads"] or "lib"
+        print(
+            f"{row['layout']:<10}{threads:>8}{row['fps']:>8.1f}"
+            f"{row['inference_ms']:>9.1f}ms{latency['p50']:>7.0f}ms"
+            f"{latency['p95']:>7.0f}ms{latency['p99']:>7.0f}ms{row['dropped']:>9}"
+        )
+    print(
+        f"""{"-" * 78}
+p50/p95/p99 are capture-to-annotated latency. Threads "lib" is the library default."""
+    )
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Measure YOLO FPS and tail latency for each thread count and CPU layout."
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="test_pattern",
+        help='"test_pattern", "picamera", a camera index or a video file',
+    )
+    parser.add_argument(
+        "--task",
+        type=str,
+        default="Detection",
+        choices=["Detection", "Segmentation", "Pose Estimation"],
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="Model size index: 0 = nano, 1 = small, 2 = medium",
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence")
+    parser.add_argument(
+        "--threads",
+        type=str,
+        default=",".join(str(n) for n in range(1, len(AVAILABLE_CPUS) + 1)),
+        help="Comma-separated inference thread counts (0 = library default)",
+    )
+    parser.add_argument(
+        "--layouts",
+        type=str,
+        default="default,auto",
+        help="Comma-separated CPU layouts to try: default (unpinned), auto",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=15.0, help="Measured seconds per point"
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=3.0, help="Unmeasured seconds per point"
+    )
+    parser.add_argument(
+        "--json", type=str, default=None, help="Also write the results to a file"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run every thread count / layout combination"""
+    args = parse_arguments()
+
+    layouts = [layout.strip() for layout in args.layouts.split(",")]
+    unknown = [layout for layout in layouts if layout not in LAYOUTS]
+    if unknown:
+        print(f"Error: Unknown layout(s): {', '.join(unknown)}")
+        exit(1)
+    thread_counts = [int(n) for n in args.threads.split(",")]
+
+    model_path = get_model_options(args.task)[args.size]
+    # Loading through the registry records the inference pool threads
+    model = get_model_registry().get(model_path)
+
+    rows = []
+    for layout in layouts:
+        for threads in thread_counts:
+            print(f"Running layout={layout} threads={threads or 'lib'}...")
+            try:
+                row = run_point(
+                    model,
+                    args.source,
+                    build_cpu_settings(layout, threads),
+                    args.conf,
+                    args.warmup,
+                    args.duration,
+                )
+            except RuntimeError as e:
+                print(f"Error: {e}")
+                exit(1)
+            rows.append({"layout": layout, "threads": threads, **row})
+
+    print_results(rows, model_path, args.source)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            report = {"model": model_path, "source": args.source, "rows": rows}
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 from llama_cpp import Llama
-import time
 import argparse
 import os
 import random
+import sys
 import psutil
 
+# Make the helpers shared between the examples (edge_ai_common) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from edge_ai_common.instrumentation import get_registry, now, start_metrics_server
+
+metrics = get_registry()
+
 
 def get_memory_usage():
     """Get current memory usage in MB"""
@@ -94,13 +100,32 @@ def run_inference(llm, prompt, max_tokens):
     """Run inference on the model and return results with timing"""
     formatted_prompt = f"Question: {prompt}\n\nAnswer:"
 
-    start_time = time.time()
-    output = llm(formatted_prompt, max_tokens=max_tokens)
-    end_time = time.time()
+    token_latency = metrics.histogram(
+        "llm_token_seconds", "Time between generated tokens"
+    )
+    first_token_latency = metrics.histogram(
+        "llm_first_token_seconds", "Time to the first generated token"
+    )
+    tokens_counter = metrics.counter("llm_tokens", "Generated tokens")
+
+    # Stream the output so every token can be timed individually
+    pieces = []
+    start_time = now()
+    last_token_time = start_time
+    for chunk in llm(formatted_prompt, max_tokens=max_tokens, stream=True):
+        token_time = now()
+        if not pieces:
+            first_token_latency.record(token_time - start_time)
+        else:
+            token_latency.record(token_time - last_token_time)
+        last_token_time = token_time
+        pieces.append(chunk["choices"][0]["text"])
+        tokens_counter.inc()
 
-    duration = end_time - start_time
-    tokens_per_sec = max_tokens / duration
-    response_text = output["choices"][0]["text"].strip()
+    duration = now() - start_time
+    metrics.histogram("llm_request_seconds", "Full generation time").record(duration)
+    tokens_per_sec = len(pieces) / duration if duration > 0 else 0.0
+    response_text = "".join(pieces).strip()
 
     return response_text, duration, tokens_per_sec
 
@@ -147,6 +172,18 @@ Note: This inference ran locally on your device using {threads} CPU threads."""
     print(results)
 
 
+def print_latency_summary():
+    """Print token latency percentiles collected over all runs"""
+    first_token = metrics.histogram("llm_first_token_seconds")
+    per_token = metrics.histogram("llm_token_seconds")
+    summary = f"""
+Token Latency (all runs):
+Time to first token: p50 {first_token.percentile(0.5) * 1000:.0f} ms, p99 {first_token.percentile(0.99) * 1000:.0f} ms
+Per token: p50 {per_token.percentile(0.5) * 1000:.1f} ms, p90 {per_token.percentile(0.9) * 1000:.1f} ms, p99 {per_token.percentile(0.99) * 1000:.1f} ms
+Tokens generated: {metrics.counter("llm_tokens").value}"""
+    print(summary)
+
+
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -166,6 +203,19 @@ def parse_arguments():
         default=None,
         help="Custom prompt to use (overrides prompts.txt)",
     )
+    parser.add_argument("--runs", type=int, default=1, help="Number of prompts to run")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve latency histograms at http://localhost:PORT/metrics while running",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=str,
+        default=None,
+        help="Write a JSON snapshot of the latency histograms to this file at the end",
+    )
     return parser.parse_args()
 
 
@@ -175,6 +225,9 @@ def main():
         # Parse command line arguments
         args = parse_arguments()
 
+        if args.metrics_port:
+            start_metrics_server(metrics, args.metrics_port)
+
         # Validate model path
         model_path = validate_model_path(args.model)
         model_info = get_model_info(model_path)
@@ -187,35 +240,42 @@ def main():
             model_path, args.threads, args.ctx
         )
 
-        # Load prompt and run inference
-        prompt = load_prompts(args.prompt)
-        if args.prompt:
-            print(f"Using custom prompt: {prompt}")
-        else:
-            print(f"Selected prompt: {prompt}")
-
-        response_text, duration, tokens_per_sec = run_inference(
-            llm, prompt, args.tokens
-        )
-
-        # Calculate final memory usage
-        final_memory = get_memory_usage()
-        inference_memory = final_memory - model_loaded_memory
-        total_memory = (
-            final_memory - get_memory_usage() + model_memory + inference_memory
-        )
-
-        # Print results
-        print_results(
-            response_text,
-            duration,
-            tokens_per_sec,
-            model_memory,
-            inference_memory,
-            total_memory,
-            final_memory,
-            args.threads,
-        )
+        for _ in range(args.runs):
+            # Load prompt and run inference
+            prompt = load_prompts(args.prompt)
+            if args.prompt:
+                print(f"Using custom prompt: {prompt}")
+            else:
+                print(f"Selected prompt: {prompt}")
+
+            response_text, duration, tokens_per_sec = run_inference(
+                llm, prompt, args.tokens
+            )
+
+            # Calculate final memory usage
+            final_memory = get_memory_usage()
+            inference_memory = final_memory - model_loaded_memory
+            total_memory = (
+                final_memory - get_memory_usage() + model_memory + inference_memory
+            )
+
+            # Print results
+            print_results(
+                response_text,
+                duration,
+                tokens_per_sec,
+                model_memory,
+                inference_memory,
+                total_memory,
+                final_memory,
+                args.threads,
+            )
+
+        print_latency_summary()
+
+        if args.metrics_json:
+            metrics.dump_json(args.metrics_json)
+            print(f"Metrics snapshot written to {args.metrics_json}")
 
     except FileNotFoundError as e:
         print(e)
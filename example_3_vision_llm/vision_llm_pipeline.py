@@ -0,0 +1,587 @@
+"""Run YOLO11 and TinyLlama together with the CPU split between them."""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from itertools import cycle
+
+# Reuse the code of the two examples (and edge_ai_common) as they are
+sys.path.extend(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", folder)
+    for folder in ("", "example_1_yolo_object_detection", "example_2_tinyllama")
+)
+
+from modules.annotator import FastAnnotator
+from modules.cpu_config import (
+    AVAILABLE_CPUS,
+    detect_core_clusters,
+    format_cpu_list,
+    inference_pool_threads,
+    parse_cpu_list,
+    pin_thread,
+    set_inference_threads,
+)
+from modules.model_registry import get_model_registry
+from modules.multi_stream import create_stream_source
+from modules.recording import META_FILE, ReplaySource
+from modules.ui_components import get_model_options
+from modules.yolo_inference import predict, annotate
+import tinyllama_benchmark as tinyllama
+from edge_ai_common.instrumentation import Histogram, now
+
+TINYLLAMA_DIR = os.path.dirname(os.path.abspath(tinyllama.__file__))
+
+PHASES = ["vision", "llm", "unmanaged", "scheduled"]
+
+# Scenes described in the LLM-only phase, so it does the same work as with vision
+SAMPLE_SUMMARIES = [
+    "2 persons, 1 bicycle",
+    "1 car, 1 truck, 3 persons",
+    "1 dog, 1 person, 1 bench",
+    "nothing",
+]
+
+# Nice value of the LLM threads in the scheduled phase (higher = lower priority)
+LLM_NICE = 10
+
+
+def summarize_detections(results):
+    """Describe detections as text such as "2 persons, 1 car"."""
+    if results.boxes is None or len(results.boxes) == 0:
+        return "nothing"
+    counts = Counter(results.names[int(c)] for c in results.boxes.cls.tolist())
+    return ", ".join(
+        f"{n} {name}{'s' if n > 1 else ''}" for name, n in counts.most_common()
+    )
+
+
+def build_prompt(summary):
+    """Turn a detection summary into a question for TinyLlama."""
+    return (
+        f"Question: A security camera detects: {summary}. "
+        f"Describe the scene in one short sentence.\n\nAnswer:"
+    )
+
+
+def partition_cores(llm_cpus=None, vision_cpus=None):
+    """
+    Split the CPUs between vision and the LLM.
+
+    Vision (capture and YOLO) gets the big cores on big.LITTLE boards and
+    the LLM the little ones. On symmetric CPUs the LLM gets a quarter of
+    the cores (at least one), so the camera keeps most of the machine.
+
+    Returns:
+        tuple: (vision_cpus, llm_cpus)
+    """
+    if vision_cpus and llm_cpus:
+        return vision_cpus, llm_cpus
+
+    clusters = detect_core_clusters()
+    if len(clusters) > 1:
+        default_llm = clusters[-1][1]
+    elif len(AVAILABLE_CPUS) > 1:
+        default_llm = AVAILABLE_CPUS[-max(1, len(AVAILABLE_CPUS) // 4) :]
+    else:
+        default_llm = AVAILABLE_CPUS
+
+    llm_cpus = llm_cpus or default_llm
+    vision_cpus = vision_cpus or [c for c in AVAILABLE_CPUS if c not in llm_cpus]
+    return vision_cpus or AVAILABLE_CPUS, llm_cpus
+
+
+def create_source(spec):
+    """Capture source for a camera, file or stream spec, or a recording folder."""
+    if os.path.exists(os.path.join(spec, META_FILE)):
+        return ReplaySource(spec, realtime=True, loop=True)
+    return create_stream_source(spec)
+
+
+class IdleGate:
+    """
+    Let the LLM generate only while the vision loop is between frames.
+
+    The vision loop marks itself busy around inference and drawing; the
+    LLM waits for idle before asking for each token.
+    """
+
+    def __init__(self):
+        self.idle = threading.Event()
+        self.idle.set()
+
+    @contextmanager
+    def busy(self):
+        """Mark the vision loop busy for the duration of the block."""
+        self.idle.clear()
+        try:
+            yield
+        finally:
+            self.idle.set()
+
+    def wait_idle(self, timeout):
+        """Wait for the vision loop to be idle; returns False on timeout."""
+        return self.idle.wait(timeout)
+
+
+class VisionWorker(threading.Thread):
+    """Capture, YOLO and annotation loop, the latency-critical workload."""
+
+    def __init__(self, model, source_spec, confidence, cpus=None, threads=0, gate=None):
+        super().__init__(daemon=True, name="VisionWorker")
+        self.model = model
+        self.source_spec = source_spec
+        self.confidence = confidence
+        self.cpus = cpus
+        self.threads = threads
+        self.gate = gate
+        self.stop_event = threading.Event()
+        self.ready_event = threading.Event()
+
+        self.latency = Histogram()
+        self.inference = Histogram()
+        self.frames = 0
+        self.dropped = 0
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.summary = None
+        self.error = None
+
+    def run(self):
+        """Process the newest frame until stopped."""
+        source = create_source(self.source_spec)
+        try:
+            set_inference_threads(self.threads)
+            pin_thread(threading.get_native_id(), self.cpus)
+            for native_id in inference_pool_threads():
+                pin_thread(native_id, self.cpus)
+
+            source.start()
+            if not source.wait_ready(10.0):
+                raise RuntimeError(source.error or f"No frames from {self.source_spec}")
+            pin_thread(source.native_id, self.cpus)
+
+            annotator = FastAnnotator()
+            self.ready_event.set()
+            self.start_time = now()
+            while not self.stop_event.is_set():
+                frame, info = source.read(timeout=1.0)
+                if frame is None:
+                    if source.finished:
+                        raise RuntimeError(source.error or "Source stopped")
+                    continue
+
+                with self.gate.busy() if self.gate else nullcontext():
+                    results, inference_time = predict(
+                        self.model, frame, self.confidence
+                    )
+                    annotate(results, annotator=annotator)
+
+                self.latency.record(now() - info.timestamp)
+                self.inference.record(inference_time)
+                self.frames += 1
+                self.summary = summarize_detections(results)
+            self.end_time = now()
+            self.dropped = source.stats()[1]
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.ready_event.set()
+            source.stop()
+            source.join(timeout=3.0)
+
+    def stop(self):
+        """Signal the loop to stop."""
+        self.stop_event.set()
+
+    def report(self):
+        """FPS and latency of the loop."""
+        elapsed = self.end_time - self.start_time
+        return {
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "latency_p50_ms": self.latency.percentile(0.5) * 1000,
+            "latency_p99_ms": self.latency.percentile(0.99) * 1000,
+            "inference_p50_ms": self.inference.percentile(0.5) * 1000,
+            "inference_p99_ms": self.inference.percentile(0.99) * 1000,
+        }
+
+
+class LlmWorker(threading.Thread):
+    """
+    Describe the latest detection summary with TinyLlama, over and over.
+
+    The model is loaded on this thread after pinning and lowering its
+    priority, so llama.cpp's own worker threads inherit both.
+    """
+
+    def __init__(
+        self,
+        model_path,
+        threads,
+        context_size,
+        max_tokens,
+        summary_source,
+        cpus=None,
+        nice=0,
+        gate=None,
+    ):
+        super().__init__(daemon=True, name="LlmWorker")
+        self.model_path = model_path
+        self.threads = threads
+        self.context_size = context_size
+        self.max_tokens = max_tokens
+        self.summary_source = summary_source
+        self.cpus = cpus
+        self.nice = nice
+        self.gate = gate
+        self.stop_event = threading.Event()
+        self.ready_event = threading.Event()
+
+        self.first_token = Histogram()
+        self.per_token = Histogram()
+        self.tokens = 0
+        self.requests = 0
+        self.gate_wait = 0.0
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.last_description = None
+        self.error = None
+
+    def run(self):
+        """Load the model and generate descriptions until stopped."""
+        llm = None
+        try:
+            pin_thread(threading.get_native_id(), self.cpus)
+            if self.nice and hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            llm, _, _ = tinyllama.load_model(
+                self.model_path, self.threads, self.context_size
+            )
+
+            self.ready_event.set()
+            self.start_time = now()
+            while not self.stop_event.is_set():
+                summary = self.summary_source()
+                if summary is None:
+                    self.stop_event.wait(0.05)
+                    continue
+                self.last_description = (summary, self._generate(llm, summary))
+                self.requests += 1
+            self.end_time = now()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.ready_event.set()
+            del llm  # Frees the llama.cpp context and its threads
+
+    def _generate(self, llm, summary):
+        """Stream one description, asking for each token only while vision is idle."""
+        stream = llm(build_prompt(summary), max_tokens=self.max_tokens, stream=True)
+        pieces = []
+        start_time = now()
+        last_token_time = start_time
+        try:
+            while not self.stop_event.is_set():
+                if self.gate is not None:
+                    wait_start = now()
+                    while not self.gate.wait_idle(0.1):
+                        if self.stop_event.is_set():
+                            return "".join(pieces).strip()
+                    self.gate_wait += now() - wait_start
+
+                chunk = next(stream, None)
+                if chunk is None:
+                    break
+                token_time = now()
+                if not pieces:
+                    self.first_token.record(token_time - start_time)
+                else:
+                    self.per_token.record(token_time - last_token_time)
+                last_token_time = token_time
+                pieces.append(chunk["choices"][0]["text"])
+                self.tokens += 1
+        finally:
+            stream.close()
+        return "".join(pieces).strip()
+
+    def stop(self):
+        """Signal the worker to stop after the current token."""
+        self.stop_event.set()
+
+    def report(self):
+        """Token rate and latency of the generations."""
+        elapsed = self.end_time - self.start_time
+        return {
+            "tokens_per_sec": self.tokens / elapsed if elapsed > 0 else 0.0,
+            "tokens": self.tokens,
+            "requests": self.requests,
+            "first_token_p50_ms": self.first_token.percentile(0.5) * 1000,
+            "token_p50_ms": self.per_token.percentile(0.5) * 1000,
+            "token_p99_ms": self.per_token.percentile(0.99) * 1000,
+            "gate_wait_share": self.gate_wait / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def run_phase(
+    name, args, yolo_model, llm_model_path, vision_cpus, llm_cpus, use_idle_gate
+):
+    """
+    Run one measurement phase for `args.duration` seconds.
+
+    Returns:
+        dict: Vision and/or LLM reports of the phase
+    """
+    all_cpus = len(AVAILABLE_CPUS)
+    scheduled = name == "scheduled"
+    gate = IdleGate() if scheduled and use_idle_gate else None
+
+    vision = None
+    if name != "llm":
+        vision = VisionWorker(
+            yolo_model,
+            args.source,
+            args.conf,
+            cpus=vision_cpus if scheduled else None,
+            threads=len(vision_cpus) if scheduled else 0,
+            gate=gate,
+        )
+
+    llm = None
+    if name != "vision":
+        if vision is not None:
+
+            def summary_source():
+                return vision.summary
+
+        else:
+            summary_source = cycle(SAMPLE_SUMMARIES).__next__
+        llm = LlmWorker(
+            llm_model_path,
+            len(llm_cpus) if scheduled else all_cpus,
+            args.ctx,
+            args.tokens,
+            summary_source,
+            cpus=llm_cpus if scheduled else None,
+            nice=LLM_NICE if scheduled else 0,
+            gate=gate,
+        )
+
+    # Vision first, so its threads are pinned before llama.cpp starts its own
+    workers = [w for w in (vision, llm) if w is not None]
+    for worker in workers:
+        worker.start()
+        worker.ready_event.wait(60.0)
+
+    time.sleep(args.duration)
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        worker.join(timeout=30.0)
+
+    for worker in workers:
+        if worker.error:
+            raise RuntimeError(f"{worker.name}: {worker.error}")
+
+    report = {}
+    if vision is not None:
+        report["vision"] = vision.report()
+    if llm is not None:
+        report["llm"] = llm.report()
+        report["last_description"] = llm.last_description
+    return report
+
+
+def print_results(reports, vision_cpus, llm_cpus, use_idle_gate):
+    """Print each phase and how much the workloads slow each other down"""
+    gate = "idle gate on" if use_idle_gate else "idle gate off"
+    print(
+        f"""
+Vision + LLM Co-Scheduling
+Scheduled split: vision → CPU {format_cpu_list(vision_cpus)}, LLM → CPU {format_cpu_list(llm_cpus)} (nice {LLM_NICE}, {gate})
+{"-" * 86}
+{"Phase":<12}{"FPS":>7}{"Lat p50":>10}{"Lat p99":>10}{"Inf p50":>10}{"Dropped":>9}{"Tok/s":>8}{"Tok p99":>10}{"Gate wait":>10}
+{"-" * 86}"""
+    )
+    for name, report in reports.items():
+        vision = report.get("vision")
+        llm = report.get("llm")
+        row = f"{name:<12}"
+        if vision:
+            row += (
+                f"{vision['fps']:>7.1f}{vision['latency_p50_ms']:>8.0f}ms"
+                f"{vision['latency_p99_ms']:>8.0f}ms{vision['inference_p50_ms']:>8.0f}ms"
+                f"{vision['dropped']:>9}"
+            )
+        else:
+            row += f"{'-':>7}{'-':>10}{'-':>10}{'-':>10}{'-':>9}"
+        if llm:
+            row += (
+                f"{llm['tokens_per_sec']:>8.1f}{llm['token_p99_ms']:>8.0f}ms"
+                f"{llm['gate_wait_share']:>9.0%}"
+            )
+        else:
+            row += f"{'-':>8}{'-':>10}{'-':>10}"
+        print(row)
+    print("-" * 86)
+
+    vision_alone = reports.get("vision", {}).get("vision")
+    llm_alone = reports.get("llm", {}).get("llm")
+    for name in ("unmanaged", "scheduled"):
+        if name not in reports:
+            continue
+        parts = []
+        if vision_alone and vision_alone["fps"] > 0:
+            vision = reports[name]["vision"]
+            parts.append(
+                f"vision FPS {vision['fps'] / vision_alone['fps']:.0%} of alone, "
+                f"p99 latency x{vision['latency_p99_ms'] / max(vision_alone['latency_p99_ms'], 1e-9):.1f}"
+            )
+        if llm_alone and llm_alone["tokens_per_sec"] > 0:
+            llm = reports[name]["llm"]
+            parts.append(
+                f"LLM tokens/s {llm['tokens_per_sec'] / llm_alone['tokens_per_sec']:.0%} of alone"
+            )
+        if parts:
+            print(f"{name.capitalize()}: " + "; ".join(parts))
+
+    for name, report in reports.items():
+        if report.get("last_description"):
+            summary, description = report["last_description"]
+            print(f'\n[{name}] Scene "{summary}" → {description}')
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Run YOLO11 detection and TinyLlama scene descriptions on the "
+        "same device, and measure how much they slow each other down."
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="test_pattern",
+        help='"test_pattern", "picamera", a camera index, a video file or a recording folder',
+    )
+    parser.add_argument(
+        "--task",
+        type=str,
+        default="Detection",
+        choices=["Detection", "Segmentation", "Pose Estimation"],
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=0,
+        choices=[0, 1, 2],
+        help="YOLO model size index: 0 = nano, 1 = small, 2 = medium",
+    )
+    parser.add_argument("--conf", type=float, default=0.25, help="YOLO confidence")
+    parser.add_argument(
+        "--model", type=str, default="Q4_K_M", help="TinyLlama variant (Q4_K_M, Q8_0)"
+    )
+    parser.add_argument("--ctx", type=int, default=512, help="LLM context window")
+    parser.add_argument(
+        "--tokens", type=int, default=48, help="Tokens per scene description"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds per phase"
+    )
+    parser.add_argument(
+        "--phases",
+        type=str,
+        default=",".join(PHASES),
+        help="Comma-separated phases to run: " + ", ".join(PHASES),
+    )
+    parser.add_argument(
+        "--vision-cpus", type=str, default="", help='CPUs for vision, e.g. "0-2"'
+    )
+    parser.add_argument(
+        "--llm-cpus", type=str, default="", help='CPUs for the LLM, e.g. "3"'
+    )
+    parser.add_argument(
+        "--idle-gate",
+        type=str,
+        default="auto",
+        choices=["auto", "on", "off"],
+        help="Let the LLM generate only while vision is idle in the scheduled "
+        "phase; auto = only when the vision and LLM CPUs overlap",
+    )
+    parser.add_argument(
+        "--json", type=str, default=None, help="Also write the results to a file"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Run the measurement phases and print the interference report"""
+    args = parse_arguments()
+
+    phases = [phase.strip() for phase in args.phases.split(",")]
+    unknown = [phase for phase in phases if phase not in PHASES]
+    if unknown:
+        print(f"Error: Unknown phase(s): {', '.join(unknown)}")
+        exit(1)
+
+    try:
+        vision_cpus, llm_cpus = partition_cores(
+            parse_cpu_list(args.llm_cpus), parse_cpu_list(args.vision_cpus)
+        )
+        llm_model_path = tinyllama.validate_model_path(
+            args.model
+            if args.model.endswith(".gguf")
+            else os.path.join(
+                TINYLLAMA_DIR, "models", f"tinyllama-1.1b-chat-v1.0.{args.model}.gguf"
+            )
+        )
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+        exit(1)
+
+    # With separate cores the LLM cannot slow vision down, so gating it would
+    # only throttle it and show up in the report as interference
+    if args.idle_gate == "auto":
+        use_idle_gate = bool(set(vision_cpus) & set(llm_cpus))
+    else:
+        use_idle_gate = args.idle_gate == "on"
+
+    yolo_model = get_model_registry().get(get_model_options(args.task)[args.size])
+
+    reports = {}
+    for phase in phases:
+        print(f"Running phase '{phase}' for {args.duration:.0f} s...")
+        try:
+            reports[phase] = run_phase(
+                phase,
+                args,
+                yolo_model,
+                llm_model_path,
+                vision_cpus,
+                llm_cpus,
+                use_idle_gate,
+            )
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            exit(1)
+
+    print_results(reports, vision_cpus, llm_cpus, use_idle_gate)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            report = {
+                "vision_cpus": vision_cpus,
+                "llm_cpus": llm_cpus,
+                "idle_gate": use_idle_gate,
+                "phases": reports,
+            }
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Make the shared helpers and the object detection modules importable."""
+
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "example_1_yolo_object_detection")]
@@ -0,0 +1,68 @@
+"""Tests for the level changes of the adaptive FPS controller."""
+
+from modules.adaptive_controller import STRIDE_LEVELS, AdaptiveFpsController
+
+
+def run(controller, inference_time, frames):
+    """Feed `frames` updates with a steady inference time; returns the changes."""
+    changes = 0
+    samples = [inference_time] * 10
+    for _ in range(frames):
+        if controller.update(samples):
+            changes += 1
+    return changes
+
+
+def test_steps_down_one_level_per_cooldown_when_too_slow():
+    controller = AdaptiveFpsController(target_fps=30, cooldown_frames=5)
+    # 20 FPS at 640 is below the 25.5 FPS lower bound
+    assert run(controller, 0.05, 4) == 0
+    assert run(controller, 0.05, 1) == 1
+    assert (controller.imgsz, controller.stride) == (480, 1)
+
+
+def test_waits_for_enough_samples():
+    controller = AdaptiveFpsController(target_fps=30, cooldown_frames=0)
+    assert not controller.update([0.5] * 9)
+    assert controller.update([0.5] * 10)
+
+
+def test_steps_up_only_with_headroom():
+    controller = AdaptiveFpsController(target_fps=30, cooldown_frames=0)
+    controller.level = 1  # 480
+
+    # 640 would run at (480/640)^2 / 0.022 = 25.6 FPS: not enough headroom
+    assert run(controller, 0.022, 5) == 0
+    assert controller.level == 1
+
+    # 640 would run at 37.5 FPS, above the 34.5 FPS upper bound
+    assert run(controller, 0.015, 1) == 1
+    assert controller.level == 0
+
+
+def test_does_not_flip_flop_inside_the_hysteresis_band():
+    controller = AdaptiveFpsController(target_fps=30, cooldown_frames=0)
+    # 28 FPS is below target but inside the band, so the level holds
+    assert run(controller, 1 / 28, 50) == 0
+    assert controller.level == 0
+
+
+def test_level_is_clamped_at_both_ends():
+    controller = AdaptiveFpsController(target_fps=30, cooldown_frames=0)
+    run(controller, 1.0, 20)
+    assert controller.level == len(controller.levels) - 1
+    assert not controller.update([1.0] * 10)
+
+    run(controller, 0.0001, 20)
+    assert controller.level == 0
+    assert not controller.update([0.0001] * 10)
+
+
+def test_stride_levels_only_change_the_stride():
+    controller = AdaptiveFpsController(target_fps=30, levels=STRIDE_LEVELS)
+    assert controller.predicted_fps(0.05, 1) == 2 / 0.05
+    controller.cooldown_frames = 0
+    run(controller, 0.05, 1)
+    assert (controller.imgsz, controller.stride) == (None, 2)
+    assert controller.should_infer(4) and not controller.should_infer(5)
+    assert "imgsz" not in controller.status()
@@ -0,0 +1,195 @@
+"""Tests for the latest-frame buffer and fast-mode replay."""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from edge_ai_common.instrumentation import get_registry  # noqa: E402
+from modules.capture import FrameSource, LatestFrameBuffer, PiCameraSource  # noqa: E402
+from modules.recording import FrameRecorder, ReplaySource, load_recording  # noqa: E402
+
+
+def publish(buffer, value, timestamp=0.0):
+    """Fill a free slot with `value` and commit it."""
+    slot = buffer.begin_write()
+    slot[...] = value
+    buffer.commit(timestamp)
+    return slot
+
+
+def slot_index(buffer, array):
+    return next(i for i, slot in enumerate(buffer.slots) if slot is array)
+
+
+def test_write_slot_is_never_latest_or_reading():
+    buffer = LatestFrameBuffer((2, 2, 3))
+    publish(buffer, 1)
+    frame, _ = buffer.read(0, timeout=0)
+    reading = slot_index(buffer, frame)
+
+    for value in range(2, 10):
+        slot = buffer.begin_write()
+        index = slot_index(buffer, slot)
+        assert index != reading
+        assert index != buffer.latest
+        slot[...] = value
+        buffer.commit(0.0)
+
+    # The frame being read was never overwritten
+    assert (frame == 1).all()
+
+
+def test_read_returns_newest_frame_and_counts_drops():
+    buffer = LatestFrameBuffer((2, 2, 3))
+    publish(buffer, 1, timestamp=1.0)
+    publish(buffer, 2, timestamp=2.0)
+    publish(buffer, 3, timestamp=3.0)
+
+    frame, info = buffer.read(0, timeout=0)
+    assert (frame == 3).all()
+    assert info.seq == 3
+    assert info.timestamp == 3.0
+    assert info.dropped == 2
+    assert buffer.frames_written == 3
+
+    # A frame that was read before the next one arrived is not a drop
+    publish(buffer, 4)
+    frame, info = buffer.read(info.seq, timeout=0)
+    assert (frame == 4).all()
+    assert info.dropped == 2
+
+
+def test_read_times_out_without_a_new_frame():
+    buffer = LatestFrameBuffer((2, 2, 3))
+    publish(buffer, 1)
+    _, info = buffer.read(0, timeout=0)
+    assert buffer.read(info.seq, timeout=0.01) == (None, None)
+
+
+def test_wait_consumed_follows_reads():
+    buffer = LatestFrameBuffer((2, 2, 3))
+    assert buffer.wait_consumed(timeout=0)
+    publish(buffer, 1)
+    assert not buffer.wait_consumed(timeout=0.01)
+    buffer.read(0, timeout=0)
+    assert buffer.wait_consumed(timeout=0)
+
+
+class AllocatingSource(FrameSource):
+    """Source that returns new arrays instead of filling the slot it is given."""
+
+    def __init__(self, frames):
+        super().__init__(name="AllocatingSource")
+        self.frames = list(frames)
+
+    def capture(self, out):
+        if not self.frames or self.stop_event.is_set():
+            return None
+        if out is not None and self.buffer.frames_written:
+            self.buffer.wait_consumed(timeout=5.0)
+        return self.frames.pop(0)
+
+
+def test_frames_not_written_into_the_slot_are_still_published():
+    source = AllocatingSource(np.full((2, 2, 3), i, dtype=np.uint8) for i in range(3))
+    source.start()
+    values = []
+    for _ in range(3):
+        frame, _ = source.read(timeout=5.0)
+        values.append(int(frame[0, 0, 0]))
+    source.join(timeout=5.0)
+    assert values == [0, 1, 2]
+    assert source.error is None
+
+
+def test_frame_format_change_stops_the_source_with_an_error():
+    frames = [np.zeros((2, 2, 3), dtype=np.uint8), np.zeros((4, 4, 3), dtype=np.uint8)]
+    source = AllocatingSource(frames)
+    source.start()
+    source.read(timeout=5.0)
+    source.join(timeout=5.0)
+    assert source.finished
+    assert "Frame format changed" in source.error
+
+
+def test_sources_add_to_the_process_wide_frame_counters():
+    captured = get_registry().counter("camera_frames_captured")
+    before = captured.value
+    for _ in range(2):
+        source = AllocatingSource(np.zeros((2, 2, 3), dtype=np.uint8) for _ in range(3))
+        source.start()
+        for _ in range(3):
+            source.read(timeout=5.0)
+        source.join(timeout=5.0)
+    assert captured.value - before == 6
+
+
+def test_unknown_pi_camera_format_is_rejected():
+    source = PiCameraSource({"format": "YUV420", "size": (640, 480), "warmup_time": 0})
+    with pytest.raises(ValueError, match="YUV420"):
+        source.open()
+
+
+@pytest.fixture(params=["jpeg", "raw"])
+def recording(tmp_path, request):
+    """A five-frame recording whose frames are filled with 0..4."""
+    path = str(tmp_path / "clip")
+    recorder = FrameRecorder(path, "test", frame_format=request.param)
+    for i in range(5):
+        recorder.write(np.full((4, 6, 3), i, dtype=np.uint8), i / 30)
+    recorder.close()
+    assert recorder.dropped == 0
+    return path
+
+
+def test_fast_replay_steps_one_frame_per_read(recording):
+    source = ReplaySource(recording, realtime=False)
+    source.start()
+    try:
+        assert source.wait_ready(5.0)
+
+        # The next frame is only published once the current one is read
+        time.sleep(0.1)
+        assert source.stats() == (1, 0)
+
+        values = []
+        for _ in range(5):
+            frame, info = source.read(timeout=5.0)
+            assert frame is not None
+            values.append(int(frame[0, 0, 0]))
+        assert values == [0, 1, 2, 3, 4]
+        assert info.dropped == 0
+
+        # End of a recording without loop
+        assert source.read(timeout=5.0) == (None, None)
+        source.join(timeout=5.0)
+        assert source.finished
+        assert source.error is None
+    finally:
+        source.stop()
+
+
+def test_jpeg_recordings_are_scaled_and_smaller_than_raw(tmp_path):
+    frame = np.zeros((64, 96, 3), dtype=np.uint8)
+    frame[16:48, 24:72] = (0, 128, 255)
+    sizes = {}
+    for frame_format in ["jpeg", "raw"]:
+        path = str(tmp_path / frame_format)
+        recorder = FrameRecorder(path, "test", frame_format=frame_format, scale=0.5)
+        for i in range(3):
+            recorder.write(frame, i / 30)
+        recorder.close()
+
+        frames, timestamps, meta = load_recording(path)
+        assert len(frames) == 3
+        assert meta["format"] == frame_format
+        assert meta["shape"] == [32, 48, 3]
+        assert frames[2].shape == (32, 48, 3)
+        assert np.abs(frames[2].astype(int) - frame[::2, ::2]).mean() < 8
+        sizes[frame_format] = meta["bytes"]
+
+    assert sizes["raw"] == 3 * 32 * 48 * 3
+    assert sizes["jpeg"] < sizes["raw"]
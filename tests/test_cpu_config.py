@@ -0,0 +1,42 @@
+"""Tests for parsing and formatting CPU lists."""
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from modules import cpu_config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def eight_cpus(monkeypatch):
+    monkeypatch.setattr(cpu_config, "AVAILABLE_CPUS", list(range(8)))
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("0-3,6", [0, 1, 2, 3, 6]),
+        (" 1 , 2 ", [1, 2]),
+        ("3,1-2,2", [1, 2, 3]),
+        ("7", [7]),
+        ("", None),
+        (" , ", None),
+    ],
+)
+def test_parse_cpu_list(text, expected):
+    assert cpu_config.parse_cpu_list(text) == expected
+
+
+@pytest.mark.parametrize("text", ["8", "0-9", "a", "1-", "1-2-3"])
+def test_parse_cpu_list_rejects_bad_or_unavailable_cpus(text):
+    with pytest.raises(ValueError):
+        cpu_config.parse_cpu_list(text)
+
+
+@pytest.mark.parametrize(
+    ("cpus", "text"),
+    [([0, 1, 2, 3, 6], "0-3,6"), ([5], "5"), ([4, 0, 2, 1], "0-2,4"), ([], "")],
+)
+def test_format_cpu_list_round_trips(cpus, text):
+    assert cpu_config.format_cpu_list(cpus) == text
+    assert cpu_config.parse_cpu_list(text) == (sorted(cpus) or None)
@@ -0,0 +1,80 @@
+"""Tests for the mask encoding of the detection export."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from modules.detection_export import (  # noqa: E402
+    DetectionExporter,
+    encode_rle,
+    masks_to_frame,
+)
+
+
+def decode_rle(counts, shape):
+    """Inverse of encode_rle, for checking round trips."""
+    pixels = np.zeros(sum(counts), dtype=bool)
+    position = 0
+    for i, count in enumerate(counts):
+        pixels[position : position + count] = i % 2 == 1
+        position += count
+    return pixels.reshape(shape, order="F")
+
+
+def test_rle_is_column_major_and_starts_with_zeros():
+    mask = np.array([[0, 1], [1, 1]], dtype=bool)
+    # Column-major pixels: 0, 1, 1, 1
+    assert encode_rle(mask) == [1, 3]
+
+
+def test_rle_of_mask_starting_with_ones_has_empty_zero_run():
+    assert encode_rle(np.ones((2, 3), dtype=bool)) == [0, 6]
+    assert encode_rle(np.zeros((2, 3), dtype=bool)) == [6]
+
+
+def test_rle_round_trip():
+    rng = np.random.default_rng(0)
+    mask = rng.random((17, 23)) > 0.6
+    counts = encode_rle(mask)
+    assert sum(counts) == mask.size
+    assert (decode_rle(counts, mask.shape) == mask).all()
+
+
+def test_masks_are_mapped_out_of_the_letterbox():
+    # A 100x200 frame letterboxed into 64x64: scaled to 32x64, 16 px padding
+    masks = np.zeros((2, 64, 64), dtype=bool)
+    masks[0, 16:48, :] = True  # The whole image area
+    masks[1, :16, :] = True  # Only the padding
+
+    scaled = masks_to_frame(masks, 100, 200)
+    assert scaled.shape == (2, 100, 200)
+    assert scaled[0].all()
+    assert not scaled[1].any()
+
+
+def test_masks_already_at_frame_size_are_unchanged():
+    masks = np.zeros((1, 10, 20), dtype=bool)
+    assert masks_to_frame(masks, 10, 20) is masks
+
+
+def test_masks_of_a_non_square_letterbox_line_up_with_the_frame():
+    # An 80x80 frame letterboxed into 48x64: scaled to 48x48, 8 px padding
+    masks = np.zeros((1, 48, 64), dtype=bool)
+    masks[0, :, 8:56] = True
+
+    scaled = masks_to_frame(masks, 80, 80)
+    assert scaled.shape == (1, 80, 80)
+    assert scaled[0].all()
+
+
+def test_submit_stops_once_the_writer_has_failed(tmp_path):
+    exporter = DetectionExporter(str(tmp_path / "detections.jsonl"))
+    exporter.start()
+    exporter.error = "No space left on device"
+
+    exporter.submit(None, 0, 0.0, "camera")
+    assert exporter.submitted == 0
+    assert exporter.queue.empty()
+    assert "No space left on device" in exporter.status()
+    exporter.close()
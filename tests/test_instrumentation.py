@@ -0,0 +1,39 @@
+"""Tests for the fixed-memory latency histogram."""
+
+import pytest
+
+from edge_ai_common.instrumentation import Histogram
+
+
+def test_empty_histogram_reports_zero():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) == 0.0
+    assert histogram.percentile(0.99) == 0.0
+    assert histogram.mean() == 0.0
+
+
+def test_percentiles_are_within_bucket_error():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    # Buckets report their upper edge, which is at most 1/32 above the value
+    for q, expected in [(0.5, 0.050), (0.9, 0.090), (0.99, 0.099)]:
+        value = histogram.percentile(q)
+        assert expected <= value <= expected * (1 + 1 / 32)
+
+
+def test_percentile_never_exceeds_max():
+    histogram = Histogram()
+    histogram.record(0.0123)
+    assert histogram.percentile(0.5) == pytest.approx(0.0123)
+    assert histogram.percentile(1.0) == pytest.approx(0.0123)
+
+
+def test_tiny_and_huge_values_are_clamped_into_range():
+    histogram = Histogram()
+    histogram.record(0.0)  # Below 1 us
+    histogram.record(10_000.0)  # Beyond the last power of two
+    assert histogram.count == 2
+    assert histogram.percentile(0.01) <= 2e-6
+    assert histogram.percentile(1.0) == 10_000.0
@@ -0,0 +1,72 @@
+"""Tests for the stream routing and idle cleanup of the MJPEG server."""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from modules.mjpeg_server import (  # noqa: E402
+    LOCAL_HOST,
+    STREAM_IDLE_TIMEOUT,
+    MjpegServer,
+    _parse_path,
+)
+
+
+def test_paths_address_one_named_stream():
+    assert _parse_path("/stream/abc123.mjpg") == ("stream", "abc123")
+    assert _parse_path("/snapshot/abc123.jpg?t=1") == ("snapshot", "abc123")
+
+
+def test_unscoped_and_malformed_paths_are_rejected():
+    for path in [
+        "/stream.mjpg",
+        "/snapshot.jpg",
+        "/stream/.mjpg",
+        "/stream/a/b.mjpg",
+        "/stream/abc123.jpg",
+        "/metrics",
+    ]:
+        assert _parse_path(path) == (None, None), path
+
+
+@pytest.fixture
+def server():
+    server = MjpegServer(0)  # Any free port
+    yield server
+    server.stop()
+
+
+def get_status(server, path):
+    """HTTP status of a GET on the server."""
+    port = server.httpd.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5):
+            return 200
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_server_is_local_only_and_serves_named_snapshots(server):
+    assert server.httpd.server_address[0] == LOCAL_HOST
+    server.open_stream("abc123").publish(np.zeros((8, 8, 3), dtype=np.uint8))
+
+    assert get_status(server, "/snapshot/abc123.jpg") == 200
+    assert get_status(server, "/snapshot/other.jpg") == 404
+    assert get_status(server, "/snapshot.jpg") == 404
+
+
+def test_idle_streams_without_viewers_are_closed(server):
+    idle = server.open_stream("idle")
+    watched = server.open_stream("watched")
+    server.open_stream("active")
+    idle.last_publish -= STREAM_IDLE_TIMEOUT + 1
+    watched.last_publish -= STREAM_IDLE_TIMEOUT + 1
+    watched.viewers = 1
+
+    server.close_idle_streams()
+    assert sorted(server.streams) == ["active", "watched"]
+    assert idle.stop_event.is_set()
@@ -0,0 +1,79 @@
+"""Tests for the LRU eviction of the shared model registry."""
+
+import gc
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("ultralytics")
+
+from modules.model_registry import ModelRegistry, SharedModel  # noqa: E402
+
+
+class FakeModel:
+    """Stands in for a YOLO model; calls return the model path."""
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.overrides = {"imgsz": 320}
+        self.predictor = None
+
+    def __call__(self, *args, **kwargs):
+        return self.model_path
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A 100 MB registry whose models weigh 40 MB and load instantly."""
+    registry = ModelRegistry(memory_budget_mb=100)
+    monkeypatch.setattr(registry, "_load", lambda path: (FakeModel(path), 40.0, 0.0))
+    return registry
+
+
+def release(*models):
+    """Drop the caller's references so the registry sees the models as unused."""
+    del models
+    gc.collect()
+
+
+def test_hits_share_one_model_behind_one_lock(registry):
+    first = registry.get("a.pt")
+    second = registry.get("a.pt")
+    assert isinstance(first, SharedModel)
+    assert first._model is second._model
+    assert first._lock is second._lock
+    assert second("frame") == "a.pt"
+    assert second.default_imgsz == 320
+
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_least_recently_used_unused_model_is_evicted(registry):
+    release(registry.get("a.pt"), registry.get("b.pt"))
+    release(registry.get("a.pt"))  # b is now the least recently used
+    release(registry.get("c.pt"))
+
+    stats = registry.stats()
+    assert stats["resident"] == ["a.pt", "c.pt"]
+    assert stats["evictions"] == 1
+    assert stats["resident_mb"] <= stats["budget_mb"]
+
+
+def test_models_in_use_are_never_evicted(registry):
+    held = registry.get("a.pt")
+    release(registry.get("b.pt"))
+    release(registry.get("c.pt"))
+
+    # b was unused and goes; a is still held, so it stays
+    stats = registry.stats()
+    assert stats["resident"] == ["a.pt", "c.pt"]
+    assert stats["in_use"] == ["a.pt"]
+
+    # Everything in use: the new model is loaded over the budget instead
+    also_held = registry.get("c.pt")
+    registry.get("d.pt")
+    stats = registry.stats()
+    assert stats["resident"] == ["a.pt", "c.pt", "d.pt"]
+    assert stats["resident_mb"] > stats["budget_mb"]
+    assert held and also_held
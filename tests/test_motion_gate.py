@@ -0,0 +1,50 @@
+"""Tests for the keyframe decisions and statistics of the motion gate."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+from modules.motion_gate import MotionGate  # noqa: E402
+
+
+def frame(value):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+def test_first_frame_always_runs_yolo():
+    assert MotionGate().should_infer(frame(0))
+
+
+def test_static_frames_skip_and_moving_frames_run():
+    gate = MotionGate(threshold=4.0, keyframe_interval=100)
+    gate.keyframe(frame(100), None, 0.05)
+
+    assert not gate.should_infer(frame(102))
+    assert gate.should_infer(frame(110))
+
+
+def test_keyframe_is_forced_after_the_interval():
+    gate = MotionGate(keyframe_interval=3)
+    gate.keyframe(frame(100), None, 0.05)
+    for _ in range(2):
+        assert not gate.should_infer(frame(100))
+        gate.carry(frame(100))
+    assert gate.should_infer(frame(100))
+
+
+def test_stats_report_skips_and_saved_compute():
+    gate = MotionGate()
+    assert gate.stats() == (0.0, 0.0)
+
+    gate.keyframe(frame(100), None, 0.1)
+    for _ in range(3):
+        gate.carry(frame(100))
+    gate.tracking_time = 0.02  # Exact value instead of the measured one
+
+    skip_rate, saved_fraction = gate.stats()
+    assert skip_rate == 0.75
+    # 4 frames would cost 0.4 s with YOLO; 0.1 s + 0.02 s were spent
+    assert saved_fraction == pytest.approx(0.7)
@@ -0,0 +1,58 @@
+"""Tests for the tiling helpers and cross-tile NMS."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+from modules.tiled_inference import make_tiles, merge_detections  # noqa: E402
+
+
+def kept(boxes, threshold=0.6):
+    return sorted(merge_detections(torch.tensor(boxes), threshold).tolist())
+
+
+def test_box_cut_at_a_tile_edge_is_merged_into_the_full_box():
+    # The cut box lies inside the full one: low IoU, but overlap/smaller = 1
+    boxes = [
+        [0.0, 0.0, 100.0, 100.0, 0.9, 0.0],
+        [60.0, 0.0, 100.0, 100.0, 0.8, 0.0],
+    ]
+    assert kept(boxes) == [0]
+
+
+def test_highest_score_survives():
+    boxes = [
+        [60.0, 0.0, 100.0, 100.0, 0.95, 0.0],
+        [0.0, 0.0, 100.0, 100.0, 0.5, 0.0],
+    ]
+    assert kept(boxes) == [0]
+
+
+def test_other_classes_and_separate_boxes_are_kept():
+    boxes = [
+        [0.0, 0.0, 100.0, 100.0, 0.9, 0.0],
+        [10.0, 10.0, 90.0, 90.0, 0.8, 1.0],  # Same place, other class
+        [200.0, 200.0, 250.0, 250.0, 0.7, 0.0],  # Elsewhere
+    ]
+    assert kept(boxes) == [0, 1, 2]
+
+
+def test_partial_overlap_below_threshold_is_kept():
+    # Intersection 25x100 over the smaller box 50x100 = 0.5
+    boxes = [
+        [0.0, 0.0, 100.0, 100.0, 0.9, 0.0],
+        [75.0, 0.0, 125.0, 100.0, 0.8, 0.0],
+    ]
+    assert kept(boxes, threshold=0.6) == [0, 1]
+    assert kept(boxes, threshold=0.4) == [0]
+
+
+def test_tiles_cover_the_region_evenly():
+    tiles = make_tiles((0, 0, 1000, 320), 320, 0.2)
+    xs = [tile[0] for tile in tiles]
+    assert xs[0] == 0
+    assert tiles[-1][2] == 1000
+    gaps = [b - a for a, b in zip(xs, xs[1:])]
+    assert max(gaps) <= 320 * 0.8
+    assert max(gaps) - min(gaps) <= 1
@@ -0,0 +1,75 @@
+"""Tests for per-session uploads and the result cache keys."""
+
+import hashlib
+import io
+import os
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from modules import video_cache  # noqa: E402
+from modules.video_cache import result_key, save_upload  # noqa: E402
+
+
+class FakeUpload(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile."""
+
+    def __init__(self, data, file_id, name="clip.MP4"):
+        super().__init__(data)
+        self.file_id = file_id
+        self.name = name
+
+
+@pytest.fixture(autouse=True)
+def upload_root(tmp_path, monkeypatch):
+    root = str(tmp_path / "uploads")
+    monkeypatch.setattr(video_cache, "UPLOAD_ROOT", root)
+    monkeypatch.setattr(video_cache, "CHUNK_SIZE", 4)  # Several chunks per file
+    monkeypatch.setattr(video_cache, "start_upload_sweeper", lambda: None)
+    return root
+
+
+def test_upload_is_written_with_its_hash(upload_root):
+    data = b"not really a video"
+    upload = save_upload(FakeUpload(data, "id-1"), "session")
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert upload["sha256"] == sha256
+    assert upload["path"] == os.path.join(upload_root, "session", f"{sha256[:16]}.mp4")
+    with open(upload["path"], "rb") as f:
+        assert f.read() == data
+    assert os.listdir(os.path.join(upload_root, "session")) == [
+        os.path.basename(upload["path"])
+    ]
+
+
+def test_same_upload_is_not_written_again():
+    first = save_upload(FakeUpload(b"frames", "id-1"), "session")
+    os.utime(first["path"], (0, 0))
+
+    assert save_upload(FakeUpload(b"frames", "id-1"), "session", first) is first
+    assert os.path.getmtime(first["path"]) == 0
+
+
+def test_new_upload_replaces_the_previous_one():
+    first = save_upload(FakeUpload(b"first", "id-1"), "session")
+    second = save_upload(FakeUpload(b"second", "id-2"), "session", first)
+
+    assert not os.path.exists(first["path"])
+    assert os.path.exists(second["path"])
+
+
+def test_result_key_depends_on_every_setting():
+    key = result_key("abc", "yolo11n.pt", 0.5, "Detection")
+    assert key == result_key("abc", "yolo11n.pt", 0.50001, "Detection")
+    assert len(key) == 24
+
+    others = [
+        result_key("abd", "yolo11n.pt", 0.5, "Detection"),
+        result_key("abc", "yolo11s.pt", 0.5, "Detection"),
+        result_key("abc", "yolo11n.pt", 0.6, "Detection"),
+        result_key("abc", "yolo11n.pt", 0.5, "Segmentation"),
+    ]
+    assert key not in others
+    assert len(set(others)) == len(others)